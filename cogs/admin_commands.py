@@ -3,8 +3,10 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from typing import Optional
-from utils.config import config_data, save_config
-from utils.panda_api import PandaAPI
+from utils.config import config_data, save_config, get_guild_settings
+from utils.guild_settings import GuildSettings, parse_daily_time
+from utils.daily_scheduler import get_zone
+from utils.outbound import ADMIN, followup, send_message
 
 logger = logging.getLogger(__name__)
 
@@ -13,22 +15,24 @@ class AdminCommands(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.panda_api = PandaAPI()
-    
-    async def cog_unload(self):
-        """Cleanup when cog is unloaded"""
-        await self.panda_api.close()
+        # Shared with the other cogs (one prefetch buffer and connection pool)
+        self.panda_api = bot.panda_api
     
     @app_commands.command(name="pandaconfig", description="Configure daily panda settings (Admin only)")
     @app_commands.describe(
         channel="The channel to send daily pandas to",
-        time_str="Time to send daily panda (24-hour UTC, e.g., 14:30)",
-        enabled="Enable or disable daily pandas"
+        time_str="Time to send daily panda (24-hour, in the configured timezone, e.g., 14:30)",
+        enabled="Enable or disable daily pandas",
+        timezone="IANA timezone for the daily time, e.g., Europe/Berlin (default UTC)"
     )
     async def pandaconfig_cmd(self, interaction: discord.Interaction, 
                              channel: Optional[discord.TextChannel] = None, 
                              time_str: Optional[str] = None, 
-                             enabled: Optional[bool] = None):
+                             enabled: Optional[bool] = None,
+                             timezone: Optional[str] = None):
+        if interaction.guild is None:
+            await interaction.response.send_message("Daily pandas are configured per server. Use this in a server.", ephemeral=True)
+            return
         if not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message("You need Administrator permission to use this.", ephemeral=True)
             return
@@ -37,68 +41,69 @@ class AdminCommands(commands.Cog):
         changes = []
         
         try:
+            settings = get_guild_settings(interaction.guild.id, create=True)
             if channel:
-                config_data["daily_channel_id"] = channel.id
+                settings.channel_id = channel.id
                 changes.append(f"Channel → {channel.mention}")
             
             if time_str:
-                hour, minute = map(int, time_str.split(":"))
-                assert 0 <= hour <= 23 and 0 <= minute <= 59
-                config_data["daily_time"] = time_str
+                parse_daily_time(time_str)
+                settings.daily_time = time_str
                 changes.append(f"Time → {time_str}")
-                
-                # Restart daily task if it exists
-                daily_cog = self.bot.get_cog("DailyTasks")
-                if daily_cog and hasattr(daily_cog, 'daily_panda_task') and daily_cog.daily_panda_task.is_running():
-                    daily_cog.daily_panda_task.restart()
+            
+            if timezone:
+                get_zone(timezone)
+                settings.timezone = timezone
+                changes.append(f"Timezone → {timezone}")
             
             if enabled is not None:
-                config_data["enabled"] = enabled
+                settings.enabled = enabled
                 changes.append("Enabled" if enabled else "Disabled")
-                
-                daily_cog = self.bot.get_cog("DailyTasks")
-                if daily_cog and hasattr(daily_cog, 'daily_panda_task'):
-                    if enabled:
-                        if config_data["daily_channel_id"] and not daily_cog.daily_panda_task.is_running():
-                            daily_cog.daily_panda_task.start()
-                    else:
-                        if daily_cog.daily_panda_task.is_running():
-                            daily_cog.daily_panda_task.cancel()
             
             save_config(config_data)
             
+            # Move this guild's entry in the scheduler heap
+            daily_cog = self.bot.get_cog("DailyTasks")
+            if daily_cog and changes:
+                daily_cog.reschedule(interaction.guild.id)
+            
             if not changes:
                 changes.append("No changes provided.")
             
             embed = discord.Embed(title="🐼 Panda Configuration", color=0x3498db)
-            ch = f"<#{config_data['daily_channel_id']}>" if config_data["daily_channel_id"] else "Not set"
-            embed.add_field(name="Daily Channel", value=ch, inline=True)
-            embed.add_field(name="Daily Time (UTC)", value=config_data["daily_time"], inline=True)
-            embed.add_field(name="Enabled", value="Yes" if config_data["enabled"] else "No", inline=True)
+            self.add_settings_fields(embed, settings)
             embed.add_field(name="Changes", value=" | ".join(changes), inline=False)
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            await followup(interaction, embed=embed, ephemeral=True)
             
         except Exception as e:
             logger.error(f"/pandaconfig error: {e}")
-            await interaction.followup.send("Failed to update settings.", ephemeral=True)
+            await followup(interaction, "Failed to update settings.", ephemeral=True)
+    
+    def add_settings_fields(self, embed: discord.Embed, settings: Optional[GuildSettings]):
+        """Add a guild's daily settings to an embed"""
+        ch = f"<#{settings.channel_id}>" if settings and settings.channel_id else "Not set"
+        embed.add_field(name="Daily Channel", value=ch, inline=True)
+        if settings:
+            daily_time = f"{settings.daily_time} ({settings.timezone})"
+        else:
+            daily_time = f"{config_data['daily_time']} ({config_data['timezone']})"
+        embed.add_field(name="Daily Time", value=daily_time, inline=True)
+        embed.add_field(name="Enabled", value="Yes" if settings and settings.enabled else "No", inline=True)
     
     @app_commands.command(name="pandastatus", description="Check current configuration and status")
     async def pandastatus_cmd(self, interaction: discord.Interaction):
         try:
             embed = discord.Embed(title="🐼 Panda Bot Status", color=0x9b59b6)
-            ch = f"<#{config_data['daily_channel_id']}>" if config_data["daily_channel_id"] else "Not set"
-            embed.add_field(name="Daily Channel", value=ch, inline=True)
-            embed.add_field(name="Daily Time (UTC)", value=config_data["daily_time"], inline=True)
-            embed.add_field(name="Enabled", value="Yes" if config_data["enabled"] else "No", inline=True)
+            settings = get_guild_settings(interaction.guild.id) if interaction.guild else None
+            self.add_settings_fields(embed, settings)
             embed.add_field(name="Guilds", value=str(len(self.bot.guilds)), inline=True)
             embed.add_field(name="Latency", value=f"{round(self.bot.latency * 1000)} ms", inline=True)
             
             daily_cog = self.bot.get_cog("DailyTasks")
-            if daily_cog and hasattr(daily_cog, 'daily_panda_task'):
-                if daily_cog.daily_panda_task.is_running() and config_data["enabled"]:
-                    nxt = daily_cog.daily_panda_task.next_iteration
-                    if nxt:
-                        embed.add_field(name="Next Delivery", value=f"<t:{int(nxt.timestamp())}:R>", inline=False)
+            if daily_cog and interaction.guild:
+                nxt = daily_cog.scheduler.next_delivery(interaction.guild.id)
+                if nxt:
+                    embed.add_field(name="Next Delivery", value=f"<t:{nxt}:R>", inline=False)
             
             await interaction.response.send_message(embed=embed)
         except Exception as e:
@@ -107,30 +112,33 @@ class AdminCommands(commands.Cog):
     
     @app_commands.command(name="pandatest", description="Send a test daily panda (Admin only)")
     async def pandatest_cmd(self, interaction: discord.Interaction):
+        if interaction.guild is None:
+            await interaction.response.send_message("Daily pandas are configured per server. Use this in a server.", ephemeral=True)
+            return
         if not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message("You need Administrator permission to use this.", ephemeral=True)
             return
         
-        if not config_data["daily_channel_id"]:
+        settings = get_guild_settings(interaction.guild.id)
+        if not settings or not settings.channel_id:
             await interaction.response.send_message("Daily channel not configured. Use /pandaconfig first.", ephemeral=True)
             return
         
         await interaction.response.send_message("Sending test panda...", ephemeral=True)
         
         try:
-            channel = self.bot.get_channel(config_data["daily_channel_id"])
-            img = await self.panda_api.fetch_panda_image()
-            fact = await self.panda_api.fetch_panda_fact()
+            channel = self.bot.get_channel(settings.channel_id)
+            img, fact = await self.panda_api.fetch_panda_bundle()
             
             embed = discord.Embed(title="🧪 Test Panda", description=fact or "", color=0x2ecc71)
             if img:
                 embed.set_image(url=img)
             
-            await channel.send(embed=embed)
-            await interaction.followup.send("Test panda sent.", ephemeral=True)
+            await send_message(channel, embed=embed, lane=ADMIN)
+            await followup(interaction, "Test panda sent.", ephemeral=True)
         except Exception as e:
             logger.error(f"/pandatest error: {e}")
-            await interaction.followup.send("Failed to send test.", ephemeral=True)
+            await followup(interaction, "Failed to send test.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(AdminCommands(bot))
\ No newline at end of file
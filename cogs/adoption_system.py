@@ -3,12 +3,14 @@ from discord.ext import commands
 from discord import app_commands
 import random
 import logging
-from datetime import datetime, timedelta
+from datetime import date
 from utils.adoption_helpers import (
-    get_user_currency, add_user_currency, subtract_user_currency,
-    get_available_pandas, get_panda_by_id, adopt_panda,
-    get_user_pandas, update_panda_stats
+    get_user_currency, get_available_pandas, get_panda_by_id, get_panda_name,
+    get_user_pandas, get_owned_panda, get_streak, adoption_transaction
 )
+from utils.clock import format_epoch, now, today
+from utils.cooldowns import cooldowns
+from utils.outbound import followup
 
 logger = logging.getLogger(__name__)
 
@@ -73,21 +75,16 @@ class AdoptionSystem(commands.Cog):
         """Get title for panda level"""
         return self.level_titles.get(min(level, 15), f"🌟 Level {level}")
     
-    def calculate_streak_bonus(self, user_id: str, action_type: str) -> tuple[int, str]:
-        """Calculate bonus coins and experience based on daily streaks"""
-        from utils.config import adoption_data, save_adoption_data
+    def calculate_streak_bonus(self, txn, action_type: str) -> tuple[int, str]:
+        """Calculate bonus coins and experience based on daily streaks (staged on txn)"""
+        current_day = today()
+        today_date = date.fromordinal(current_day).isoformat()
+        current_streak, last_date = get_streak(txn.user_id, action_type)
         
-        today = datetime.utcnow().date().isoformat()
-        streak_key = f"{action_type}_streak_{user_id}"
-        last_date_key = f"last_{action_type}_date_{user_id}"
-        
-        current_streak = adoption_data["user_currency"].get(streak_key, 0)
-        last_date = adoption_data["user_currency"].get(last_date_key, "")
-        
-        if last_date == today:
+        if last_date == today_date:
             return 0, ""  # Already got bonus today
         
-        yesterday = (datetime.utcnow().date() - timedelta(days=1)).isoformat()
+        yesterday = date.fromordinal(current_day - 1).isoformat()
         
         if last_date == yesterday:
             # Continue streak
@@ -97,9 +94,7 @@ class AdoptionSystem(commands.Cog):
             current_streak = 1
         
         # Update streak data
-        adoption_data["user_currency"][streak_key] = current_streak
-        adoption_data["user_currency"][last_date_key] = today
-        save_adoption_data(adoption_data)
+        txn.set_streak(action_type, current_streak, today_date)
         
         # Calculate bonus based on streak
         if current_streak >= 30:
@@ -188,7 +183,7 @@ class AdoptionSystem(commands.Cog):
                     value="• Use `/adoptlist` to see available pandas\n• Check the panda ID spelling\n• Make sure the panda hasn't been adopted yet",
                     inline=False
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             if not panda["available"]:
@@ -203,7 +198,7 @@ class AdoptionSystem(commands.Cog):
                     inline=False
                 )
                 embed.set_thumbnail(url=panda["image_url"])
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Check adoption requirements
@@ -214,7 +209,7 @@ class AdoptionSystem(commands.Cog):
                     description=requirement_msg,
                     color=0xe67e22
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             user_currency = get_user_currency(user_id)
@@ -236,25 +231,31 @@ class AdoptionSystem(commands.Cog):
                     inline=True
                 )
                 embed.set_thumbnail(url=panda["image_url"])
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
-            # Process adoption with enhanced data
-            if subtract_user_currency(user_id, panda["adoption_fee"]) and adopt_panda(user_id, panda_id):
-                # Add enhanced adoption data
-                user_pandas = get_user_pandas(user_id)
-                for adopted in user_pandas:
-                    if adopted["panda_id"] == panda_id:
-                        # Initialize enhanced stats
-                        update_panda_stats(user_id, panda_id, "experience", 0)
-                        update_panda_stats(user_id, panda_id, "level", 1)
-                        update_panda_stats(user_id, panda_id, "adoption_date", datetime.utcnow().isoformat())
-                        update_panda_stats(user_id, panda_id, "favorite_activity", random.choice(["playing", "eating", "sleeping", "climbing", "swimming"]))
-                        update_panda_stats(user_id, panda_id, "mood", "excited")
-                        update_panda_stats(user_id, panda_id, "total_feeds", 0)
-                        update_panda_stats(user_id, panda_id, "total_plays", 0)
-                        update_panda_stats(user_id, panda_id, "custom_name", "")  # Allow renaming
-                        break
+            # Process adoption with enhanced data (fee, adoption and stats commit together)
+            with adoption_transaction(user_id) as txn:
+                txn.subtract_currency(panda["adoption_fee"])
+                txn.adopt(panda_id)
+                txn.update_panda(
+                    panda_id,
+                    experience=0,
+                    level=1,
+                    adoption_date=now(),
+                    favorite_activity=random.choice(["playing", "eating", "sleeping", "climbing", "swimming"]),
+                    mood="excited",
+                    total_feeds=0,
+                    total_plays=0,
+                    custom_name=""  # Allow renaming
+                )
+            
+            if txn.committed:
+                # A new panda starts out fed and played with, so both cooldowns are running
+                adopted = get_owned_panda(user_id, panda_id)
+                if adopted:
+                    cooldowns.record(user_id, "feed", adopted["last_fed"], panda_id)
+                    cooldowns.record(user_id, "play", adopted["last_played"], panda_id)
                 
                 embed = discord.Embed(
                     title="🎉 ADOPTION SUCCESS!",
@@ -282,7 +283,7 @@ class AdoptionSystem(commands.Cog):
                 embed.set_thumbnail(url=panda["image_url"])
                 embed.set_footer(text="💡 Use /feed and /play to bond! Try /rename to give them a custom name! Check /mypandas to see your family.")
                 
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
             else:
                 embed = discord.Embed(
                     title="❌ Adoption Failed",
@@ -294,7 +295,7 @@ class AdoptionSystem(commands.Cog):
                     value="• Wait a moment and try again\n• Check your internet connection\n• Contact support if this persists",
                     inline=False
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"Adoption error for user {interaction.user.id}: {e}")
@@ -308,7 +309,7 @@ class AdoptionSystem(commands.Cog):
                 value="• Try again in a moment\n• Contact bot support if this continues\n• Your currency is safe!",
                 inline=False
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="adoptlist", description="🏠 View all available pandas for adoption")
     async def adoptlist_cmd(self, interaction: discord.Interaction):
@@ -329,7 +330,7 @@ class AdoptionSystem(commands.Cog):
                     inline=False
                 )
                 embed.set_footer(text="🐼 Happy pandas make happy families!")
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             embed = discord.Embed(
@@ -374,7 +375,7 @@ class AdoptionSystem(commands.Cog):
                 )
             
             embed.set_footer(text="💡 Use /adopt <panda_id> to adopt! Example: /adopt panda_001")
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"Adoptlist error: {e}")
@@ -388,7 +389,7 @@ class AdoptionSystem(commands.Cog):
                 value="• Wait a moment and retry\n• The adoption center will be back soon!",
                 inline=False
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="mypandas", description="👨‍👩‍👧‍👦 View your adopted panda family and their stats")
     async def mypandas_cmd(self, interaction: discord.Interaction):
@@ -415,7 +416,7 @@ class AdoptionSystem(commands.Cog):
                     inline=False
                 )
                 embed.set_footer(text="🐼 Every panda deserves a loving family!")
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             embed = discord.Embed(
@@ -426,6 +427,7 @@ class AdoptionSystem(commands.Cog):
             
             total_happiness = 0
             total_level = 0
+            current_time = now()
             
             for adopted in user_pandas:
                 panda = get_panda_by_id(adopted["panda_id"])
@@ -445,28 +447,21 @@ class AdoptionSystem(commands.Cog):
                 total_level += level
                 
                 # Calculate time since adoption
-                adoption_date = datetime.fromisoformat(adopted.get("adoption_date", adopted["adopted_date"]))
-                days_together = (datetime.utcnow() - adoption_date).days
-                
-                # Time since last interactions
-                last_fed = datetime.fromisoformat(adopted["last_fed"])
-                last_played = datetime.fromisoformat(adopted["last_played"])
-                
-                fed_cooldown = (datetime.utcnow() - last_fed).total_seconds()
-                play_cooldown = (datetime.utcnow() - last_played).total_seconds()
+                adoption_date = adopted.get("adoption_date", adopted["adopted_date"])
+                days_together = (current_time - adoption_date) // 86400
                 
                 # Enhanced status indicators
-                if fed_cooldown >= 3600:  # Can feed
+                feed_remaining = cooldowns.remaining(user_id, "feed", adopted["panda_id"])
+                if not feed_remaining:  # Can feed
                     feed_status = "🍽️ Hungry & ready!"
                 else:
-                    remaining = int(3600 - fed_cooldown)
-                    feed_status = f"😋 Full ({self.format_time_remaining(remaining)})"
+                    feed_status = f"😋 Full ({self.format_time_remaining(feed_remaining)})"
                 
-                if play_cooldown >= 2700:  # Can play
+                play_remaining = cooldowns.remaining(user_id, "play", adopted["panda_id"])
+                if not play_remaining:  # Can play
                     play_status = "🎮 Ready to play!"
                 else:
-                    remaining = int(2700 - play_cooldown)
-                    play_status = f"😴 Resting ({self.format_time_remaining(remaining)})"
+                    play_status = f"😴 Resting ({self.format_time_remaining(play_remaining)})"
                 
                 # Happiness indicator
                 happiness_emoji, happiness_msg = self.get_happiness_message(happiness)
@@ -517,7 +512,7 @@ class AdoptionSystem(commands.Cog):
             )
             
             embed.set_footer(text="💡 Use /feed <panda_id> and /play <panda_id> to interact! Try /pandastats and /rename too!")
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"MyPandas error for user {interaction.user.id}: {e}")
@@ -531,7 +526,7 @@ class AdoptionSystem(commands.Cog):
                 value="• Wait a moment and retry\n• Your panda data is securely stored!",
                 inline=False
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="pandastats", description="📊 View detailed statistics for one of your pandas")
     @app_commands.describe(panda_id="ID of the panda to view detailed stats for")
@@ -540,14 +535,9 @@ class AdoptionSystem(commands.Cog):
         
         try:
             user_id = str(interaction.user.id)
-            user_pandas = get_user_pandas(user_id)
             
             # Find owned panda
-            owned_panda = None
-            for adopted in user_pandas:
-                if adopted["panda_id"] == panda_id:
-                    owned_panda = adopted
-                    break
+            owned_panda = get_owned_panda(user_id, panda_id)
             
             if not owned_panda:
                 embed = discord.Embed(
@@ -556,15 +546,16 @@ class AdoptionSystem(commands.Cog):
                     color=0xe74c3c
                 )
                 
+                user_pandas = get_user_pandas(user_id)
                 if user_pandas:
-                    panda_list = "\n".join([f"• {get_panda_by_id(p['panda_id'])['name'] if get_panda_by_id(p['panda_id']) else 'Unknown'} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
+                    panda_list = "\n".join([f"• {get_panda_name(p['panda_id'])} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
                     embed.add_field(
                         name="🐼 Your Pandas:",
                         value=panda_list,
                         inline=False
                     )
                 
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             panda_info = get_panda_by_id(panda_id)
@@ -574,7 +565,7 @@ class AdoptionSystem(commands.Cog):
                     description="Panda data temporarily unavailable. Please try again!",
                     color=0xe74c3c
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Get all panda stats
@@ -590,8 +581,9 @@ class AdoptionSystem(commands.Cog):
             display_name = custom_name if custom_name else panda_info['name']
             
             # Calculate detailed statistics
-            adoption_date = datetime.fromisoformat(owned_panda.get("adoption_date", owned_panda["adopted_date"]))
-            days_together = (datetime.utcnow() - adoption_date).days
+            current_time = now()
+            adoption_date = owned_panda.get("adoption_date", owned_panda["adopted_date"])
+            days_together = (current_time - adoption_date) // 86400
             
             # Experience to next level
             exp_needed = level * 100
@@ -608,11 +600,11 @@ class AdoptionSystem(commands.Cog):
                 feed_ratio = play_ratio = 0
             
             # Time since last interactions
-            last_fed = datetime.fromisoformat(owned_panda["last_fed"])
-            last_played = datetime.fromisoformat(owned_panda["last_played"])
+            last_fed = owned_panda["last_fed"]
+            last_played = owned_panda["last_played"]
             
-            fed_cooldown = (datetime.utcnow() - last_fed).total_seconds()
-            play_cooldown = (datetime.utcnow() - last_played).total_seconds()
+            feed_remaining = cooldowns.remaining(user_id, "feed", panda_id)
+            play_remaining = cooldowns.remaining(user_id, "play", panda_id)
             
             # Happiness and status
             happiness_emoji, happiness_msg = self.get_happiness_message(happiness)
@@ -671,15 +663,15 @@ class AdoptionSystem(commands.Cog):
                 )
             
             # Availability status section
-            feed_status = "Available now! 🍽️" if fed_cooldown >= 3600 else f"Ready in {self.format_time_remaining(int(3600 - fed_cooldown))}"
-            play_status = "Available now! 🎮" if play_cooldown >= 2700 else f"Ready in {self.format_time_remaining(int(2700 - play_cooldown))}"
+            feed_status = "Available now! 🍽️" if not feed_remaining else f"Ready in {self.format_time_remaining(feed_remaining)}"
+            play_status = "Available now! 🎮" if not play_remaining else f"Ready in {self.format_time_remaining(play_remaining)}"
             
             embed.add_field(
                 name="⏰ Current Availability",
                 value=f"**Feeding:** {feed_status}\n"
                       f"**Playing:** {play_status}\n"
-                      f"**Last Fed:** {last_fed.strftime('%Y-%m-%d %H:%M UTC')}\n"
-                      f"**Last Played:** {last_played.strftime('%Y-%m-%d %H:%M UTC')}",
+                      f"**Last Fed:** {format_epoch(last_fed)}\n"
+                      f"**Last Played:** {format_epoch(last_played)}",
                 inline=True
             )
             
@@ -706,9 +698,9 @@ class AdoptionSystem(commands.Cog):
                 )
             
             embed.set_thumbnail(url=panda_info["image_url"])
-            embed.set_footer(text=f"Adopted on: {adoption_date.strftime('%Y-%m-%d')} • Use /rename to change their name!")
+            embed.set_footer(text=f"Adopted on: {format_epoch(adoption_date, '%Y-%m-%d')} • Use /rename to change their name!")
             
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"PandaStats error for user {interaction.user.id}: {e}")
@@ -717,7 +709,7 @@ class AdoptionSystem(commands.Cog):
                 description="Could not load panda statistics. Please try again!",
                 color=0xe74c3c
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="rename", description="📝 Give your panda a custom name")
     @app_commands.describe(
@@ -729,14 +721,9 @@ class AdoptionSystem(commands.Cog):
         
         try:
             user_id = str(interaction.user.id)
-            user_pandas = get_user_pandas(user_id)
             
             # Find owned panda
-            owned_panda = None
-            for adopted in user_pandas:
-                if adopted["panda_id"] == panda_id:
-                    owned_panda = adopted
-                    break
+            owned_panda = get_owned_panda(user_id, panda_id)
             
             if not owned_panda:
                 embed = discord.Embed(
@@ -745,15 +732,16 @@ class AdoptionSystem(commands.Cog):
                     color=0xe74c3c
                 )
                 
+                user_pandas = get_user_pandas(user_id)
                 if user_pandas:
-                    panda_list = "\n".join([f"• {get_panda_by_id(p['panda_id'])['name'] if get_panda_by_id(p['panda_id']) else 'Unknown'} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
+                    panda_list = "\n".join([f"• {get_panda_name(p['panda_id'])} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
                     embed.add_field(
                         name="🐼 Your Pandas:",
                         value=panda_list,
                         inline=False
                     )
                 
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             panda_info = get_panda_by_id(panda_id)
@@ -763,7 +751,7 @@ class AdoptionSystem(commands.Cog):
                     description="Panda data temporarily unavailable. Please try again!",
                     color=0xe74c3c
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Validate new name
@@ -779,7 +767,7 @@ class AdoptionSystem(commands.Cog):
                     value="• Use 3-20 characters\n• Be creative and loving!\n• Choose something special that fits their personality",
                     inline=False
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             if len(new_name) > 20:
@@ -793,7 +781,7 @@ class AdoptionSystem(commands.Cog):
                     value=f"Your name '{new_name}' is {len(new_name)} characters.\nTry shortening it to fit within 20 characters!",
                     inline=False
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Check for inappropriate content (basic filter)
@@ -809,19 +797,18 @@ class AdoptionSystem(commands.Cog):
                     value="Choose a creative, loving name that reflects your panda's personality!",
                     inline=False
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Get old name for comparison
             old_custom_name = owned_panda.get('custom_name', '')
             old_display_name = old_custom_name if old_custom_name else panda_info['name']
             
-            # Update the name
-            update_panda_stats(user_id, panda_id, "custom_name", new_name)
-            
-            # Give small coin reward for naming
+            # Update the name and give small coin reward for naming
             coins_reward = 10
-            add_user_currency(user_id, coins_reward)
+            with adoption_transaction(user_id) as txn:
+                txn.update_panda(panda_id, custom_name=new_name)
+                txn.add_currency(coins_reward)
             
             # Create success embed
             embed = discord.Embed(
@@ -851,7 +838,7 @@ class AdoptionSystem(commands.Cog):
             embed.set_thumbnail(url=panda_info["image_url"])
             embed.set_footer(text="🐼 Custom names make the bond even more special! You can rename them anytime.")
             
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"Rename error for user {interaction.user.id}: {e}")
@@ -860,7 +847,7 @@ class AdoptionSystem(commands.Cog):
                 description="Something went wrong while renaming your panda. Please try again!",
                 color=0xe74c3c
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="feed", description="🍽️ Feed one of your pandas with their favorite food")
     @app_commands.describe(panda_id="ID of the panda to feed")
@@ -869,14 +856,9 @@ class AdoptionSystem(commands.Cog):
         
         try:
             user_id = str(interaction.user.id)
-            user_pandas = get_user_pandas(user_id)
             
             # Find owned panda with better error handling
-            owned_panda = None
-            for adopted in user_pandas:
-                if adopted["panda_id"] == panda_id:
-                    owned_panda = adopted
-                    break
+            owned_panda = get_owned_panda(user_id, panda_id)
             
             if not owned_panda:
                 embed = discord.Embed(
@@ -885,8 +867,9 @@ class AdoptionSystem(commands.Cog):
                     color=0xe74c3c
                 )
                 
+                user_pandas = get_user_pandas(user_id)
                 if user_pandas:
-                    panda_list = "\n".join([f"• {get_panda_by_id(p['panda_id'])['name'] if get_panda_by_id(p['panda_id']) else 'Unknown'} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
+                    panda_list = "\n".join([f"• {get_panda_name(p['panda_id'])} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
                     embed.add_field(
                         name="🐼 Your Pandas:",
                         value=panda_list,
@@ -899,7 +882,7 @@ class AdoptionSystem(commands.Cog):
                         inline=False
                     )
                 
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             panda_info = get_panda_by_id(panda_id)
@@ -909,16 +892,13 @@ class AdoptionSystem(commands.Cog):
                     description="Panda data temporarily unavailable. Please try again!",
                     color=0xe74c3c
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Enhanced cooldown checking
-            last_fed = datetime.fromisoformat(owned_panda["last_fed"])
-            time_since_fed = datetime.utcnow() - last_fed
-            cooldown_seconds = 3600  # 1 hour
+            remaining_seconds = cooldowns.remaining(user_id, "feed", panda_id)
             
-            if time_since_fed.total_seconds() < cooldown_seconds:
-                remaining_seconds = int(cooldown_seconds - time_since_fed.total_seconds())
+            if remaining_seconds:
                 time_remaining = self.format_time_remaining(remaining_seconds)
                 
                 custom_name = owned_panda.get('custom_name', '')
@@ -941,7 +921,7 @@ class AdoptionSystem(commands.Cog):
                 )
                 embed.set_thumbnail(url=panda_info["image_url"])
                 embed.set_footer(text="Well-fed pandas are happy pandas! 🐼💕")
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Enhanced feeding mechanics with more variety
@@ -949,8 +929,12 @@ class AdoptionSystem(commands.Cog):
             level = owned_panda.get('level', 1)
             current_happiness = owned_panda.get("happiness", 100)
             
+            # All changes from this feeding are committed together
+            current_time = now()
+            txn = adoption_transaction(user_id)
+            
             # Streak bonus calculation
-            streak_bonus_coins, streak_msg = self.calculate_streak_bonus(user_id, "feed")
+            streak_bonus_coins, streak_msg = self.calculate_streak_bonus(txn, "feed")
             
             # Level-based bonuses
             level_bonus = min(level * 2, 15)
@@ -974,12 +958,15 @@ class AdoptionSystem(commands.Cog):
             total_feeds = owned_panda.get('total_feeds', 0) + 1
             
             # Update panda stats
-            update_panda_stats(user_id, panda_id, "happiness", new_happiness)
-            update_panda_stats(user_id, panda_id, "last_fed", datetime.utcnow().isoformat())
-            update_panda_stats(user_id, panda_id, "experience", new_exp)
-            update_panda_stats(user_id, panda_id, "total_feeds", total_feeds)
+            txn.update_panda(
+                panda_id,
+                happiness=new_happiness,
+                last_fed=current_time,
+                experience=new_exp,
+                total_feeds=total_feeds
+            )
             if level_up:
-                update_panda_stats(user_id, panda_id, "level", new_level)
+                txn.update_panda(panda_id, level=new_level)
             
             # Enhanced coin rewards
             base_coins = random.randint(10, 20)
@@ -989,7 +976,9 @@ class AdoptionSystem(commands.Cog):
             level_up_bonus = 25 if level_up else 0
             
             total_coins = base_coins + level_coin_bonus + happiness_coin_bonus + streak_bonus_coins + milestone_bonus + level_up_bonus
-            add_user_currency(user_id, total_coins)
+            txn.add_currency(total_coins)
+            if txn.commit():
+                cooldowns.record(user_id, "feed", current_time, panda_id)
             
             # Create rich, engaging response
             activity = random.choice(self.feed_activities).format(panda_info['favorite_food'])
@@ -1058,7 +1047,7 @@ class AdoptionSystem(commands.Cog):
             embed.set_thumbnail(url=panda_info["image_url"])
             embed.set_footer(text=f"💡 Next feeding in 1 hour • Try /play {panda_id} for more fun! • Keep your panda happy for better rewards!")
             
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"Feed error for user {interaction.user.id}, panda {panda_id}: {e}")
@@ -1072,7 +1061,7 @@ class AdoptionSystem(commands.Cog):
                 value="• Wait a moment and retry\n• Check your internet connection\n• Contact support if this continues",
                 inline=False
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
     
     @app_commands.command(name="play", description="🎮 Play with one of your pandas for fun and bonding")
     @app_commands.describe(panda_id="ID of the panda to play with")
@@ -1081,14 +1070,9 @@ class AdoptionSystem(commands.Cog):
         
         try:
             user_id = str(interaction.user.id)
-            user_pandas = get_user_pandas(user_id)
             
             # Find owned panda
-            owned_panda = None
-            for adopted in user_pandas:
-                if adopted["panda_id"] == panda_id:
-                    owned_panda = adopted
-                    break
+            owned_panda = get_owned_panda(user_id, panda_id)
             
             if not owned_panda:
                 embed = discord.Embed(
@@ -1097,8 +1081,9 @@ class AdoptionSystem(commands.Cog):
                     color=0xe74c3c
                 )
                 
+                user_pandas = get_user_pandas(user_id)
                 if user_pandas:
-                    panda_list = "\n".join([f"• {get_panda_by_id(p['panda_id'])['name'] if get_panda_by_id(p['panda_id']) else 'Unknown'} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
+                    panda_list = "\n".join([f"• {get_panda_name(p['panda_id'])} (ID: `{p['panda_id']}`)" for p in user_pandas[:3]])
                     embed.add_field(
                         name="🐼 Your Pandas:",
                         value=panda_list,
@@ -1111,7 +1096,7 @@ class AdoptionSystem(commands.Cog):
                         inline=False
                     )
                 
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             panda_info = get_panda_by_id(panda_id)
@@ -1121,16 +1106,13 @@ class AdoptionSystem(commands.Cog):
                     description="Panda data temporarily unavailable. Please try again!",
                     color=0xe74c3c
                 )
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Enhanced cooldown checking
-            last_played = datetime.fromisoformat(owned_panda["last_played"])
-            time_since_played = datetime.utcnow() - last_played
-            cooldown_seconds = 2700  # 45 minutes
+            remaining_seconds = cooldowns.remaining(user_id, "play", panda_id)
             
-            if time_since_played.total_seconds() < cooldown_seconds:
-                remaining_seconds = int(cooldown_seconds - time_since_played.total_seconds())
+            if remaining_seconds:
                 time_remaining = self.format_time_remaining(remaining_seconds)
                 
                 custom_name = owned_panda.get('custom_name', '')
@@ -1153,7 +1135,7 @@ class AdoptionSystem(commands.Cog):
                 )
                 embed.set_thumbnail(url=panda_info["image_url"])
                 embed.set_footer(text="Rested pandas play better! 🐼💤")
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
                 return
             
             # Enhanced playing mechanics
@@ -1161,8 +1143,12 @@ class AdoptionSystem(commands.Cog):
             level = owned_panda.get('level', 1)
             current_happiness = owned_panda.get("happiness", 100)
             
+            # All changes from this play session are committed together
+            current_time = now()
+            txn = adoption_transaction(user_id)
+            
             # Streak bonus calculation
-            streak_bonus_coins, streak_msg = self.calculate_streak_bonus(user_id, "play")
+            streak_bonus_coins, streak_msg = self.calculate_streak_bonus(txn, "play")
             
             # Enhanced bonuses
             level_bonus = min(level * 3, 20)
@@ -1188,12 +1174,15 @@ class AdoptionSystem(commands.Cog):
             total_plays = owned_panda.get('total_plays', 0) + 1
             
             # Update panda stats
-            update_panda_stats(user_id, panda_id, "happiness", new_happiness)
-            update_panda_stats(user_id, panda_id, "last_played", datetime.utcnow().isoformat())
-            update_panda_stats(user_id, panda_id, "experience", new_exp)
-            update_panda_stats(user_id, panda_id, "total_plays", total_plays)
+            txn.update_panda(
+                panda_id,
+                happiness=new_happiness,
+                last_played=current_time,
+                experience=new_exp,
+                total_plays=total_plays
+            )
             if level_up:
-                update_panda_stats(user_id, panda_id, "level", new_level)
+                txn.update_panda(panda_id, level=new_level)
             
             # Enhanced coin rewards (playing gives more coins)
             base_coins = random.randint(15, 25)
@@ -1205,7 +1194,9 @@ class AdoptionSystem(commands.Cog):
             perfect_play_coins = 20 if perfect_play_bonus > 0 else 0
             
             total_coins = base_coins + level_coin_bonus + happiness_coin_bonus + energy_coin_bonus + streak_bonus_coins + milestone_bonus + level_up_bonus + perfect_play_coins
-            add_user_currency(user_id, total_coins)
+            txn.add_currency(total_coins)
+            if txn.commit():
+                cooldowns.record(user_id, "play", current_time, panda_id)
             
             # Create engaging response with variety
             activity = random.choice(self.play_activities)
@@ -1291,7 +1282,7 @@ class AdoptionSystem(commands.Cog):
             embed.set_thumbnail(url=panda_info["image_url"])
             embed.set_footer(text=f"💡 Next playtime in 45 minutes • Try /feed {panda_id} to keep them healthy! • Happy pandas = better rewards!")
             
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
         
         except Exception as e:
             logger.error(f"Play error for user {interaction.user.id}, panda {panda_id}: {e}")
@@ -1305,7 +1296,7 @@ class AdoptionSystem(commands.Cog):
                 value="• Wait a moment and retry\n• Check your connection\n• Contact support if this persists",
                 inline=False
             )
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
 
 async def setup(bot):
     await bot.add_cog(AdoptionSystem(bot))
\ No newline at end of file
@@ -1,10 +1,18 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import asyncio
 import logging
-from datetime import datetime, time
-from utils.config import config_data, save_config
-from utils.panda_api import PandaAPI
+from typing import Dict, List, Optional, Tuple
+from utils.config import config_data, save_config, get_guild_settings
+from utils.clock import now, format_epoch
+from utils.daily_scheduler import (
+    DAILY_CATCHUP_GRACE, DAILY_PREGEN_INTERVAL, DAILY_PREGEN_LEAD,
+    DailyScheduler, local_day, next_daily_run, previous_daily_run
+)
+from utils.guild_settings import GuildSettings
+from utils.delivery_log import delivery_log
+from utils.fanout import FanoutJob, FanoutPipeline
+from utils.outbound import send_message
 
 logger = logging.getLogger(__name__)
 
@@ -13,75 +21,200 @@ class DailyTasks(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.panda_api = PandaAPI()
+        # Shared with the other cogs (one prefetch buffer and connection pool)
+        self.panda_api = bot.panda_api
+        self.scheduler = DailyScheduler(self.deliver_batch, self.next_run)
+        self.fanout = FanoutPipeline()
+        self.start_task: Optional[asyncio.Task] = None
+        
+        # Pre-generated embeds by scheduled time: (embed, complete); incomplete ones used a fallback image
+        self.prepared: Dict[int, Tuple[discord.Embed, bool]] = {}
+        self.pregen_task: Optional[asyncio.Task] = None
+        self.pregen_hits = 0
+        self.pregen_misses = 0
     
     async def cog_load(self):
         """Called when cog is loaded"""
-        # Start daily task if configured
-        if config_data["enabled"] and config_data["daily_channel_id"] and not self.daily_panda_task.is_running():
-            self.daily_panda_task.start()
-            logger.info("Daily panda task started")
+        self.start_task = asyncio.create_task(self.start_scheduler())
     
     async def cog_unload(self):
         """Cleanup when cog is unloaded"""
-        if self.daily_panda_task.is_running():
-            self.daily_panda_task.cancel()
-        await self.panda_api.close()
+        for task in (self.start_task, self.pregen_task):
+            if task:
+                task.cancel()
+        await self.scheduler.stop()
     
-    @tasks.loop(hours=24)
-    async def daily_panda_task(self):
-        """Daily panda posting task"""
-        if not (config_data["enabled"] and config_data["daily_channel_id"]):
-            return
+    async def start_scheduler(self):
+        """Wait for the bot to be ready, then schedule every enabled guild"""
+        await self.bot.wait_until_ready()
+        self.migrate_legacy_channel()
         
-        channel = self.bot.get_channel(config_data["daily_channel_id"])
+        # Deliveries logged since config.json was last saved
+        replayed = delivery_log.replay()
+        if replayed:
+            logger.info(f"Replayed {replayed} logged daily deliveries")
+        delivery_log.compact()
+        
+        for guild_id in list(config_data["guilds"]):
+            self.reschedule(guild_id)
+        self.scheduler.start()
+        self.pregen_task = asyncio.create_task(self.pregenerate_loop())
+        logger.info(f"Daily panda scheduler started for {self.scheduler.stats()['scheduled']} guilds")
+    
+    async def pregenerate_loop(self):
+        """Build each run's embed DAILY_PREGEN_LEAD seconds before it is due"""
+        while True:
+            try:
+                for fire_at in self.scheduler.fire_times_within(DAILY_PREGEN_LEAD):
+                    prepared = self.prepared.get(fire_at)
+                    if prepared is None or not prepared[1]:
+                        self.prepared[fire_at] = await self.build_daily_embed(fire_at)
+                
+                # Forget content for runs that were delivered or dropped
+                stale = now() - DAILY_CATCHUP_GRACE
+                for fire_at in [fire_at for fire_at in self.prepared if fire_at < stale]:
+                    del self.prepared[fire_at]
+            except Exception as e:
+                logger.error(f"Daily panda pre-generation error: {e}")
+            await asyncio.sleep(DAILY_PREGEN_INTERVAL)
+    
+    def pregen_stats(self) -> Dict[str, int]:
+        return {"prepared": len(self.prepared), "hits": self.pregen_hits, "misses": self.pregen_misses}
+    
+    def migrate_legacy_channel(self):
+        """Move the old global daily channel into its guild's settings"""
+        channel_id = config_data.get("daily_channel_id")
+        if not channel_id:
+            return
+        channel = self.bot.get_channel(channel_id)
         if not isinstance(channel, discord.TextChannel):
-            logger.error("Configured daily channel not found or not a text channel")
+            logger.warning(f"Legacy daily channel {channel_id} not found; keeping it for the next start")
             return
         
+        settings = get_guild_settings(channel.guild.id, create=True)
+        if settings.channel_id is None:
+            settings.channel_id = channel_id
+            settings.enabled = bool(config_data.get("enabled"))
+        config_data["daily_channel_id"] = None
+        config_data["enabled"] = False
+        save_config(config_data)
+        logger.info(f"Migrated legacy daily channel {channel_id} to guild {channel.guild.id}")
+    
+    def last_delivered(self, guild_id: int, settings: GuildSettings) -> int:
+        """Latest delivered run for a guild, counting one that is still being sent"""
+        return max(settings.last_delivery, self.scheduler.claimed.get(guild_id, 0))
+    
+    def next_run(self, guild_id: int, after: int) -> Optional[int]:
+        """Next delivery time for a guild (None if daily posts are off there)"""
+        settings = get_guild_settings(guild_id)
+        if settings is None or not settings.active:
+            return None
+        fire_at = next_daily_run(settings, after)
+        # One post per local day, even if the time is moved later after today's post
+        last = self.last_delivered(guild_id, settings)
+        if last and local_day(settings, fire_at) == local_day(settings, last):
+            fire_at = next_daily_run(settings, fire_at)
+        return fire_at
+    
+    def missed_run(self, guild_id: int, settings: GuildSettings, current: int) -> Optional[int]:
+        """The latest daily time that was never delivered, if still inside the grace window"""
+        last = self.last_delivered(guild_id, settings)
+        if not last:
+            return None
+        missed = previous_daily_run(settings, current)
+        if current - missed > DAILY_CATCHUP_GRACE:
+            return None
+        if local_day(settings, missed) == local_day(settings, last):
+            return None
+        return missed
+    
+    def reschedule(self, guild_id: int):
+        """Apply changed settings for a guild (O(log n)), catching up a missed run"""
         try:
-            img = await self.panda_api.fetch_panda_image()
-            fact = await self.panda_api.fetch_panda_fact()
-            
-            embed = discord.Embed(title="🐼 Daily Panda!", description=fact or "", color=0x2ecc71)
-            if img:
-                embed.set_image(url=img)
-            else:
-                embed.add_field(name="Image", value="Image source unavailable right now.")
-            
-            embed.set_footer(text=f"Delivered at {datetime.utcnow().strftime('%H:%M UTC')}")
-            await channel.send(embed=embed)
-            logger.info(f"Daily panda sent to {channel.name}")
-        except Exception as e:
-            logger.error(f"Daily task error: {e}")
+            current = now()
+            fire_at = self.next_run(guild_id, current)
+            if fire_at is not None:
+                missed = self.missed_run(guild_id, get_guild_settings(guild_id), current)
+                if missed is not None:
+                    logger.info(f"Catching up missed daily panda for guild {guild_id} (due {format_epoch(missed)})")
+                    fire_at = missed
+            self.scheduler.schedule(guild_id, fire_at)
+        except ValueError as e:
+            logger.error(f"Invalid daily settings for guild {guild_id}: {e}")
+            self.scheduler.schedule(guild_id, None)
     
-    @daily_panda_task.before_loop
-    async def before_daily(self):
-        """Wait for bot to be ready and schedule first run"""
-        await self.bot.wait_until_ready()
+    async def deliver_batch(self, batch: List[Tuple[int, int]]):
+        """Post the daily panda to every guild due in this scheduler tick"""
+        jobs = []
+        for guild_id, scheduled_at in batch:
+            settings = get_guild_settings(guild_id)
+            if settings is None or not settings.active:
+                continue
+            if settings.last_delivery >= scheduled_at:
+                logger.info(f"Daily panda for guild {guild_id} already delivered, skipping")
+                continue
+            jobs.append((settings.channel_id, (guild_id, scheduled_at)))
+        if not jobs:
+            return
         
-        try:
-            hour, minute = map(int, config_data["daily_time"].split(":"))
-            target = time(hour=hour, minute=minute)
-            now = datetime.utcnow().time()
-            
-            now_sec = now.hour * 3600 + now.minute * 60 + now.second
-            tgt_sec = target.hour * 3600 + target.minute * 60
-            
-            if tgt_sec > now_sec:
-                wait = tgt_sec - now_sec
-            else:
-                wait = 86400 - (now_sec - tgt_sec)  # Wait until tomorrow
-            
-            logger.info(f"Daily panda task will start in {wait} seconds")
-            await asyncio.sleep(wait)
-        except Exception as e:
-            logger.error(f"before_loop scheduling error: {e}")
+        # One embed per tick, shared by every guild in it; normally built ahead of time
+        slots = sorted({scheduled_at for _, (_, scheduled_at) in jobs}, reverse=True)
+        prepared = None
+        for slot in slots:
+            candidate = self.prepared.pop(slot, None)
+            if candidate and prepared is None:
+                prepared = candidate
+        if prepared is not None and prepared[1]:
+            self.pregen_hits += 1
+            embed = prepared[0]
+        else:
+            # Not built ahead, or built with a fallback image: try for fresh content now
+            self.pregen_misses += 1
+            embed, complete = await self.build_daily_embed(slots[0])
+            if not complete and prepared is not None:
+                embed = prepared[0]
+        await self.fanout.run(jobs, lambda job: self.send_daily(job, embed))
+        delivery_log.sync()
+        delivery_log.maybe_compact()
     
-    @daily_panda_task.error
-    async def daily_task_error(self, error):
-        """Error handler for daily task"""
-        logger.error(f"Daily panda task error: {error}")
+    async def build_daily_embed(self, scheduled_at: int) -> Tuple[discord.Embed, bool]:
+        """Daily embed for a run and whether it got a fresh image (False if a fallback was used)"""
+        img, fact = await self.panda_api.fetch_panda_bundle()
+        complete = img is not None
+        if not img:
+            # Upstream down: use a GIF harvested earlier
+            img = await self.panda_api.fetch_panda_gif()
+        
+        embed = discord.Embed(title="🐼 Daily Panda!", description=fact or "", color=0x2ecc71)
+        if img:
+            embed.set_image(url=img)
+        else:
+            embed.add_field(name="Image", value="Image source unavailable right now.")
+        
+        embed.set_footer(text=f"Delivered at {format_epoch(scheduled_at, '%H:%M UTC')}")
+        return embed, complete
+    
+    async def send_daily(self, job: FanoutJob, embed: discord.Embed) -> bool:
+        """Send one guild's daily post. False for permanent failures; raises to retry."""
+        channel_id, (guild_id, scheduled_at) = job
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            logger.error(f"Daily channel {channel_id} for guild {guild_id} not found or not a text channel")
+            return False
+        
+        try:
+            # Background lane: user-facing replies go first during mass deliveries
+            await send_message(channel, embed=embed)
+        except (discord.Forbidden, discord.NotFound) as e:
+            logger.error(f"Cannot post daily panda in {channel_id} (guild {guild_id}): {e}")
+            return False
+        
+        # Logged (O(1)) rather than saving config.json per send; a restart replays the log
+        settings = get_guild_settings(guild_id)
+        if settings is not None:
+            settings.last_delivery = scheduled_at
+            delivery_log.record(guild_id, scheduled_at)
+        return True
 
 async def setup(bot):
-    await bot.add_cog(DailyTasks(bot))
\ No newline at end of file
+    await bot.add_cog(DailyTasks(bot))
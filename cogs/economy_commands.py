@@ -3,9 +3,12 @@ from discord.ext import commands
 from discord import app_commands
 import random
 import logging
-from datetime import datetime
-from utils.adoption_helpers import get_user_currency, add_user_currency, get_user_pandas
-from utils.config import adoption_data, save_adoption_data
+from utils.adoption_helpers import (
+    get_user_currency, get_user_pandas, adoption_transaction
+)
+from utils.clock import now
+from utils.cooldowns import cooldowns
+from utils.outbound import followup
 
 logger = logging.getLogger(__name__)
 
@@ -22,16 +25,11 @@ class EconomyCommands(commands.Cog):
             user_id = str(interaction.user.id)
             
             # Simple work system - can work every 30 minutes
-            last_work_key = f"last_work_{user_id}"
-            current_time = datetime.utcnow()
-            
-            if last_work_key in adoption_data["user_currency"]:
-                last_work_time = datetime.fromisoformat(adoption_data["user_currency"][last_work_key])
-                time_since_work = current_time - last_work_time
-                if time_since_work.total_seconds() < 1800:  # 30 minute cooldown
-                    minutes_left = int((1800 - time_since_work.total_seconds()) / 60)
-                    await interaction.followup.send(f"💼 You're tired from working! Rest for {minutes_left} more minutes.")
-                    return
+            remaining = cooldowns.remaining(user_id, "work")
+            if remaining:
+                minutes_left = remaining // 60
+                await followup(interaction, f"💼 You're tired from working! Rest for {minutes_left} more minutes.")
+                return
                     
             # Work and earn coins
             coins_earned = random.randint(20, 50)
@@ -42,9 +40,12 @@ class EconomyCommands(commands.Cog):
             else:
                 bonus_note = ""
             
-            add_user_currency(user_id, coins_earned)
-            adoption_data["user_currency"][last_work_key] = current_time.isoformat()
-            save_adoption_data(adoption_data)
+            current_time = now()
+            with adoption_transaction(user_id) as txn:
+                txn.add_currency(coins_earned)
+                txn.set_cooldown("work", current_time)
+            if txn.committed:
+                cooldowns.record(user_id, "work", current_time)
             
             work_jobs = [
                 "helped at the bamboo farm",
@@ -64,11 +65,11 @@ class EconomyCommands(commands.Cog):
             )
             embed.add_field(name="Your Balance", value=f"{get_user_currency(user_id)} bamboo coins", inline=True)
             embed.set_footer(text="You can work again in 30 minutes! ❄️")
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
             
         except Exception as e:
             logger.error(f"/work error: {e}")
-            await interaction.followup.send("Unexpected error occurred.")
+            await followup(interaction, "Unexpected error occurred.")
     
     @app_commands.command(name="daily", description="Claim your daily bamboo coin bonus (Festive 🎄)")
     async def daily_cmd(self, interaction: discord.Interaction):
@@ -77,22 +78,20 @@ class EconomyCommands(commands.Cog):
             user_id = str(interaction.user.id)
             
             # Check last daily claim
-            last_daily_key = f"last_daily_{user_id}"
-            current_time = datetime.utcnow()
-            
-            if last_daily_key in adoption_data["user_currency"]:
-                last_daily_time = datetime.fromisoformat(adoption_data["user_currency"][last_daily_key])
-                time_since_daily = current_time - last_daily_time
-                if time_since_daily.total_seconds() < 86400:  # 24 hour cooldown
-                    hours_left = int((86400 - time_since_daily.total_seconds()) / 3600)
-                    await interaction.followup.send(f"🎁 Daily bonus already claimed! Come back in {hours_left} hours.")
-                    return
+            remaining = cooldowns.remaining(user_id, "daily")
+            if remaining:
+                hours_left = remaining // 3600
+                await followup(interaction, f"🎁 Daily bonus already claimed! Come back in {hours_left} hours.")
+                return
                     
             # Give daily bonus with festive boost
             daily_bonus = 100 + 25  # +25 Holiday Cheer Bonus
-            add_user_currency(user_id, daily_bonus)
-            adoption_data["user_currency"][last_daily_key] = current_time.isoformat()
-            save_adoption_data(adoption_data)
+            current_time = now()
+            with adoption_transaction(user_id) as txn:
+                txn.add_currency(daily_bonus)
+                txn.set_cooldown("daily", current_time)
+            if txn.committed:
+                cooldowns.record(user_id, "daily", current_time)
             
             embed = discord.Embed(
                 title="🎁 Daily Bonus! (Festive)",
@@ -101,11 +100,11 @@ class EconomyCommands(commands.Cog):
             )
             embed.add_field(name="Your Balance", value=f"{get_user_currency(user_id)} bamboo coins", inline=True)
             embed.set_footer(text="Season of Giving • Try /christmasgift to share joy 🎁")
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
             
         except Exception as e:
             logger.error(f"/daily error: {e}")
-            await interaction.followup.send("Unexpected error occurred.")
+            await followup(interaction, "Unexpected error occurred.")
     
     @app_commands.command(name="balance", description="Check your bamboo coin balance (Festive 🎄)")
     async def balance_cmd(self, interaction: discord.Interaction):
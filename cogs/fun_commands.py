@@ -5,6 +5,7 @@ import random
 import asyncio
 import logging
 from utils.constants import TRIVIA_BANK, PANDA_NAMES
+from utils.outbound import followup, reply, add_reaction
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +29,7 @@ class FunCommands(commands.Cog):
             
             for i in range(len(q["options"])):
                 try:
-                    await sent.add_reaction(emoji_map[i])
+                    await add_reaction(sent, emoji_map[i])
                 except Exception:
                     pass
 
@@ -45,19 +46,19 @@ class FunCommands(commands.Cog):
                     reaction, user = await self.bot.wait_for("reaction_add", timeout=20.0, check=check)
                     chosen_index = emoji_map.index(str(reaction.emoji))
                     if chosen_index == correct_index:
-                        await sent.reply(f"✅ {user.mention} got it right! Answer: **{q['options'][correct_index]}**\n*{q['explain']}*")
+                        await reply(sent, f"✅ {user.mention} got it right! Answer: **{q['options'][correct_index]}**\n*{q['explain']}*")
                         break
                     else:
                         continue
             except asyncio.TimeoutError:
-                await sent.reply(f"⏰ Time's up! Correct answer was **{q['options'][correct_index]}**\n*{q['explain']}*")
+                await reply(sent, f"⏰ Time's up! Correct answer was **{q['options'][correct_index]}**\n*{q['explain']}*")
         except Exception as e:
             logger.error(f"/pandatrivia error: {e}")
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message("Unexpected error occurred.")
                 else:
-                    await interaction.followup.send("Unexpected error occurred.")
+                    await followup(interaction, "Unexpected error occurred.")
             except Exception:
                 pass
     
@@ -89,7 +90,7 @@ class FunCommands(commands.Cog):
             msg = await interaction.original_response()
             for emoji in ("👍", "👎"):
                 try:
-                    await msg.add_reaction(emoji)
+                    await add_reaction(msg, emoji)
                 except Exception:
                     pass
         except Exception as e:
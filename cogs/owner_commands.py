@@ -2,10 +2,15 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
-import json
 import os
 from typing import Optional, List, Dict, Any
-from utils.config import config_data, save_config
+from utils.config import config_data, save_config, get_guild_settings
+from utils.guild_settings import parse_daily_time
+from utils.daily_scheduler import get_zone
+from utils import codec
+from utils.persistence import persistence
+from utils.cooldowns import cooldowns
+from utils.outbound import followup, outbound
 
 logger = logging.getLogger(__name__)
 
@@ -56,26 +61,22 @@ class OwnerCommands(commands.Cog):
             return DEFAULT_BLACKLIST.copy()
         
         try:
-            with open(BLACKLIST_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Merge with defaults to ensure all keys exist
-                merged = DEFAULT_BLACKLIST.copy()
-                if data:
-                    merged["users"] = data.get("users", {})
-                    merged["guilds"] = data.get("guilds", {})
-                    merged["global_settings"] = {**merged["global_settings"], **data.get("global_settings", {})}
-                return merged
+            data = codec.load_file(BLACKLIST_PATH)
+            # Merge with defaults to ensure all keys exist
+            merged = DEFAULT_BLACKLIST.copy()
+            if data:
+                merged["users"] = data.get("users", {})
+                merged["guilds"] = data.get("guilds", {})
+                merged["global_settings"] = {**merged["global_settings"], **data.get("global_settings", {})}
+            return merged
         except Exception as e:
             logger.error(f"Failed to load blacklist data: {e}. Using defaults.")
             return DEFAULT_BLACKLIST.copy()
     
     def save_blacklist_data(self, data: Dict[str, Any]) -> bool:
-        """Save blacklist data to file"""
+        """Save blacklist data to file (written by the persistence thread)"""
         try:
-            tmp_path = f"{BLACKLIST_PATH}.tmp"
-            with open(tmp_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            os.replace(tmp_path, BLACKLIST_PATH)
+            persistence.submit(BLACKLIST_PATH, codec.dumps(data))
             self.blacklist_data = data  # Update cached data
             return True
         except Exception as e:
@@ -770,7 +771,7 @@ class OwnerCommands(commands.Cog):
             )
             embed.set_footer(text=f"Reloaded by {interaction.user}")
             
-            await interaction.followup.send(embed=embed)
+            await followup(interaction, embed=embed)
             logger.info(f"Commands reloaded by {interaction.user.id}: {len(synced)} commands synced")
         
         except Exception as e:
@@ -781,20 +782,22 @@ class OwnerCommands(commands.Cog):
                 color=0xe74c3c
             )
             try:
-                await interaction.followup.send(embed=embed)
+                await followup(interaction, embed=embed)
             except:
                 await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @app_commands.command(name="pandaownerset", description="[Owner] Set daily channel/time/enable")
     @app_commands.describe(
         channel="Channel to post daily panda",
-        time_str="Daily time HH:MM (UTC)",
-        enabled="Enable daily posts"
+        time_str="Daily time HH:MM (in the server's timezone)",
+        enabled="Enable daily posts",
+        timezone="IANA timezone, e.g., America/New_York"
     )
     async def owner_set(self, interaction: discord.Interaction, 
                        channel: Optional[discord.TextChannel] = None, 
                        time_str: Optional[str] = None, 
-                       enabled: Optional[bool] = None):
+                       enabled: Optional[bool] = None,
+                       timezone: Optional[str] = None):
         """Enhanced daily settings configuration"""
         if not await self.is_owner_user(interaction):
             embed = discord.Embed(
@@ -805,8 +808,20 @@ class OwnerCommands(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
+        # Settings are per guild: the channel's guild, or the guild the command is used in
+        guild = channel.guild if channel else interaction.guild
+        if guild is None:
+            embed = discord.Embed(
+                title="❌ No Server",
+                description="Pass a channel or use this command in a server.",
+                color=0xe74c3c
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
         changes = []
         try:
+            settings = get_guild_settings(guild.id, create=True)
             if channel:
                 # Check bot permissions in channel
                 perms = channel.permissions_for(channel.guild.me)
@@ -819,52 +834,49 @@ class OwnerCommands(commands.Cog):
                     await interaction.response.send_message(embed=embed, ephemeral=True)
                     return
                 
-                config_data["daily_channel_id"] = channel.id
+                settings.channel_id = channel.id
                 changes.append(f"📍 Channel → {channel.mention}")
             
             if time_str:
                 # Validate time format
                 try:
-                    hour, minute = map(int, time_str.split(":"))
-                    if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                        raise ValueError("Invalid time range")
-                except (ValueError, IndexError):
+                    parse_daily_time(time_str)
+                except ValueError:
                     embed = discord.Embed(
                         title="❌ Invalid Time Format",
-                        description="Please use HH:MM format (e.g., 14:30 for 2:30 PM UTC).",
+                        description="Please use HH:MM format (e.g., 14:30 for 2:30 PM).",
                         color=0xe74c3c
                     )
                     await interaction.response.send_message(embed=embed, ephemeral=True)
                     return
                 
-                config_data["daily_time"] = time_str
-                changes.append(f"⏰ Time → {time_str} UTC")
-                
-                # Restart daily task if running
-                daily_cog = self.bot.get_cog("DailyTasks")
-                if daily_cog and hasattr(daily_cog, 'daily_panda_task') and daily_cog.daily_panda_task.is_running():
-                    daily_cog.daily_panda_task.restart()
-                    changes.append("🔄 Task restarted")
+                settings.daily_time = time_str
+                changes.append(f"⏰ Time → {time_str}")
+            
+            if timezone:
+                try:
+                    get_zone(timezone)
+                except ValueError:
+                    embed = discord.Embed(
+                        title="❌ Unknown Timezone",
+                        description="Please use an IANA timezone name (e.g., Europe/Berlin).",
+                        color=0xe74c3c
+                    )
+                    await interaction.response.send_message(embed=embed, ephemeral=True)
+                    return
+                settings.timezone = timezone
+                changes.append(f"🌍 Timezone → {timezone}")
             
             if enabled is not None:
-                config_data["enabled"] = enabled
+                settings.enabled = enabled
                 status_text = "✅ Enabled" if enabled else "❌ Disabled"
                 changes.append(f"🎛️ Daily Posts → {status_text}")
-                
-                # Start/stop daily task
-                daily_cog = self.bot.get_cog("DailyTasks")
-                if daily_cog and hasattr(daily_cog, 'daily_panda_task'):
-                    if enabled:
-                        if config_data.get("daily_channel_id") and not daily_cog.daily_panda_task.is_running():
-                            daily_cog.daily_panda_task.start()
-                            changes.append("▶️ Task started")
-                    else:
-                        if daily_cog.daily_panda_task.is_running():
-                            daily_cog.daily_panda_task.cancel()
-                            changes.append("⏹️ Task stopped")
             
-            # Save configuration
+            # Save configuration and move the guild's scheduler entry
             save_config(config_data)
+            daily_cog = self.bot.get_cog("DailyTasks")
+            if daily_cog and changes:
+                daily_cog.reschedule(guild.id)
             
             if not changes:
                 embed = discord.Embed(
@@ -875,7 +887,7 @@ class OwnerCommands(commands.Cog):
             else:
                 embed = discord.Embed(
                     title="✅ Configuration Updated",
-                    description="Daily panda settings have been updated successfully.",
+                    description=f"Daily panda settings for **{guild.name}** have been updated successfully.",
                     color=0x2ecc71
                 )
                 embed.add_field(
@@ -930,36 +942,136 @@ class OwnerCommands(commands.Cog):
                 inline=True
             )
             
-            # Daily Task Status
-            ch = f"<#{config_data['daily_channel_id']}>" if config_data.get("daily_channel_id") else "❌ Not set"
-            daily_time = config_data.get("daily_time", "12:00")
-            daily_enabled = "✅ Yes" if config_data.get("enabled") else "❌ No"
+            # Daily Task Status (per-guild settings)
+            guild_settings = config_data["guilds"].values()
+            configured = sum(1 for settings in guild_settings if settings.channel_id)
+            enabled_count = sum(1 for settings in guild_settings if settings.active)
             
             embed.add_field(
                 name="🐼 Daily Panda Settings",
-                value=f"**Channel:** {ch}\n**Time (UTC):** {daily_time}\n**Enabled:** {daily_enabled}",
+                value=f"**Guilds configured:** {configured}\n**Enabled:** {enabled_count}\n**Default time:** {config_data.get('daily_time', '12:00')} ({config_data.get('timezone', 'UTC')})",
                 inline=False
             )
             
-            # Daily Task Runtime Status
+            # Daily Scheduler Runtime Status
             daily_cog = self.bot.get_cog("DailyTasks")
-            if daily_cog and hasattr(daily_cog, 'daily_panda_task'):
-                task_running = "✅ Running" if daily_cog.daily_panda_task.is_running() else "❌ Stopped"
+            if daily_cog:
+                scheduler = daily_cog.scheduler.stats()
+                task_running = "✅ Running" if daily_cog.scheduler.running else "❌ Stopped"
                 embed.add_field(
                     name="⚙️ Task Runtime Status",
-                    value=f"**Daily Task:** {task_running}",
+                    value=f"**Daily Scheduler:** {task_running}\n"
+                          f"**Scheduled:** {scheduler['scheduled']} guilds\n"
+                          f"**Delivered:** {scheduler['fired']} ({scheduler['in_flight']} in flight)",
                     inline=True
                 )
                 
-                # Next execution time
-                if daily_cog.daily_panda_task.is_running() and config_data.get("enabled"):
-                    nxt = daily_cog.daily_panda_task.next_iteration
-                    if nxt:
-                        embed.add_field(
-                            name="⏰ Next Delivery",
-                            value=f"<t:{int(nxt.timestamp())}:R>\n<t:{int(nxt.timestamp())}:F>",
-                            inline=True
-                        )
+                # Daily fan-out pipeline (last run and totals)
+                fanout = daily_cog.fanout.stats()
+                pregen = daily_cog.pregen_stats()
+                last_run = fanout["last_run"]
+                if last_run:
+                    last_text = (f"**Last run:** {last_run['delivered']}/{last_run['jobs']} in {last_run['duration']:.1f}s\n"
+                                 f"**Failed:** {last_run['failed']} ({last_run['retries']} retries)\n")
+                else:
+                    last_text = "**Last run:** none yet\n"
+                embed.add_field(
+                    name="📬 Daily Fan-out",
+                    value=f"{last_text}**Total:** {fanout['delivered']} delivered, {fanout['failed']} failed over {fanout['runs']} runs\n"
+                          f"**Pre-generated:** {pregen['hits']} runs ({pregen['misses']} built at send time)",
+                    inline=True
+                )
+                
+                # Earliest upcoming delivery across all guilds
+                nxt = daily_cog.scheduler.next_delivery()
+                if nxt:
+                    embed.add_field(
+                        name="⏰ Next Delivery",
+                        value=f"<t:{nxt}:R>\n<t:{nxt}:F>",
+                        inline=True
+                    )
+            
+            # Persistence worker metrics
+            persist = persistence.stats()
+            embed.add_field(
+                name="💾 Persistence",
+                value=f"**Queue:** {persist['queue_depth']}/{persist['queue_capacity']}\n"
+                      f"**Writes:** {persist['writes']} ({persist['failures']} failed)\n"
+                      f"**Latency:** {persist['avg_write_ms']:.1f}ms avg / {persist['max_write_ms']:.1f}ms max\n"
+                      f"**Back-pressure:** {persist['blocked_submits']} blocked, {persist['coalesced']} coalesced\n"
+                      f"**JSON codec:** {codec.BACKEND}",
+                inline=True
+            )
+            
+            # Outbound Discord queue, per priority lane
+            queue = outbound.stats()
+            lines = [
+                f"**{name.title()}:** {lane['sent']} sent, {lane['queued']} queued, "
+                f"{lane['avg_wait_ms']:.0f}ms avg / {lane['max_wait_ms']:.0f}ms max wait"
+                for name, lane in queue["lanes"].items()
+            ]
+            lines.append(f"**Shed:** {queue['shed']} | **Busy channels:** {queue['busy_channels']}")
+            embed.add_field(name="📤 Outbound Queue", value="\n".join(lines), inline=False)
+            
+            # Shared HTTP connection pool
+            http_client = getattr(self.bot, "http_client", None)
+            if http_client:
+                pool = http_client.stats()
+                embed.add_field(
+                    name="🌐 HTTP Pool",
+                    value=f"**Connections:** {pool['open']} open ({pool['idle']} idle)\n"
+                          f"**Requests:** {pool['requests']} ({pool['coalesced']} coalesced)\n"
+                          f"**Reuse:** {pool['reuse_ratio']:.0%} ({pool['reused']} reused / {pool['created']} new)\n"
+                          f"**Retries:** {pool['retries']} ({pool['retries_skipped']} skipped by budget/deadline)",
+                    inline=True
+                )
+                
+                # Per-host circuit breakers and adaptive timeouts
+                breaker_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+                breaker_lines = [
+                    f"{breaker_icons.get(info['state'], '⚪')} **{host}:** {info['state'].replace('_', '-')}, "
+                    f"timeout {info['timeout']:.1f}s"
+                    + (f", p95 {info['p95_ms']:.0f}ms" if info['p95_ms'] is not None else "")
+                    + (f", {info['short_circuited']} short-circuited" if info['short_circuited'] else "")
+                    for host, info in http_client.breaker_stats().items()
+                ]
+                embed.add_field(
+                    name="🔌 Upstream Circuits",
+                    value="\n".join(breaker_lines) or "No requests yet",
+                    inline=False
+                )
+            
+            panda_api = getattr(self.bot, "panda_api", None)
+            if panda_api:
+                prefetch = panda_api.prefetch_stats()
+                hedge = panda_api.hedge_stats()
+                cached = ", ".join(
+                    f"{count['unserved']}/{count['items']} {kind} ({count['hit_rate']:.0%})"
+                    for kind, count in panda_api.cache.stats().items()
+                ) or "empty"
+                embed.add_field(
+                    name="📦 Panda Prefetch",
+                    value=f"**Buffered:** {prefetch['depth']}/{prefetch['target']}\n"
+                          f"**Hit rate:** {prefetch['hit_rate']:.0%} ({prefetch['misses']} live fetches)\n"
+                          f"**Refill failures:** {prefetch['failures']}\n"
+                          f"**GIFs indexed:** {panda_api.gif_index.stats()['gifs']}\n"
+                          f"**Cached:** {cached}\n"
+                          f"**Hedged:** {hedge['hedge_rate']:.0%} of {hedge['fetches']} "
+                          f"(wins: {hedge['primary_wins']} panda / {hedge['fallback_wins']} red panda)",
+                    inline=True
+                )
+            
+            # Cooldowns ending soon (read from the expiry heap)
+            ready_soon = cooldowns.ready_within(3600)
+            by_action: Dict[str, int] = {}
+            for _, _, action, _ in ready_soon:
+                by_action[action] = by_action.get(action, 0) + 1
+            embed.add_field(
+                name="⏳ Cooldowns",
+                value=f"**Ready in next hour:** {len(ready_soon)}\n"
+                      + ("\n".join(f"**{action.title()}:** {count}" for action, count in sorted(by_action.items())) or "None pending"),
+                inline=True
+            )
             
             # Blacklist Statistics
             blacklisted_users = len(self.blacklist_data["users"])
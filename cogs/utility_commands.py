@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from typing import Optional
+from utils.outbound import ADMIN, followup, send_message
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +19,14 @@ class UtilityCommands(commands.Cog):
         safe = message.replace("@everyone", "everyone").replace("@here", "here")
         allowed = discord.AllowedMentions(everyone=False, users=False, roles=False)
         target = channel or interaction.channel
+        # The send may wait in the outbound queue; acknowledge within Discord's 3s window first
+        await interaction.response.defer(ephemeral=True)
         try:
-            await target.send(safe, allowed_mentions=allowed)
-            await interaction.response.send_message(f"Sent in {target.mention}", ephemeral=True)
+            await send_message(target, safe, allowed_mentions=allowed, lane=ADMIN)
+            await followup(interaction, f"Sent in {target.mention}", ephemeral=True)
         except Exception as e:
             logger.error(f"/say error: {e}")
-            await interaction.response.send_message("Failed to send message.", ephemeral=True)
+            await followup(interaction, "Failed to send message.", ephemeral=True)
     
     @app_commands.command(name="qr", description="Generate a QR code from text")
     @app_commands.describe(text="Text or URL to encode")
@@ -52,12 +55,12 @@ class UtilityCommands(commands.Cog):
             embed = discord.Embed(title="🧦 Your Festive QR Code", color=0x2d3436)
             embed.set_image(url="attachment://qr.png")
             embed.set_footer(text="Season of Giving 🎁")
-            await interaction.followup.send(embed=embed, file=file)
+            await followup(interaction, embed=embed, file=file)
         except ModuleNotFoundError:
-            await interaction.followup.send("QR dependencies missing. Please add qrcode[pil] and pillow to requirements.txt and reinstall.")
+            await followup(interaction, "QR dependencies missing. Please add qrcode[pil] and pillow to requirements.txt and reinstall.")
         except Exception as e:
             logger.error(f"/qr error: {e}")
-            await interaction.followup.send("Failed to generate QR code.")
+            await followup(interaction, "Failed to generate QR code.")
     
     @app_commands.command(name="pandahelp", description="Show all panda commands (Festive 🎄)")
     async def pandahelp_cmd(self, interaction: discord.Interaction):
@@ -4,6 +4,12 @@ import asyncio
 import os
 import logging
 from typing import Optional
+from utils.config import shutdown_adoption_data
+from utils.delivery_log import delivery_log
+from utils.persistence import persistence
+from utils.http_client import HTTPClient
+from utils.panda_api import PandaAPI
+from utils.outbound import followup, outbound, send_message
 
 # ==========================================
 # 🐼 PANDA BOT TOKEN CONFIGURATION
@@ -44,10 +50,17 @@ class PandaBot(commands.Bot):
         self.owner_id = BOT_OWNER_ID
         self.startup_time = None
         
+        # One connection pool for every outbound API call (injected into cogs)
+        self.http_client = HTTPClient()
+        self.panda_api = PandaAPI(self.http_client)
+        
     async def setup_hook(self):
         """Enhanced startup process with better error handling"""
         self.startup_time = discord.utils.utcnow()
         
+        # Start filling the panda image/fact buffer before commands arrive
+        self.panda_api.start_prefetch()
+        
         # Load all cogs with enhanced error handling
         cogs_to_load = [
             "cogs.core_commands",      # Basic panda commands
@@ -130,13 +143,13 @@ class PandaBot(commands.Bot):
         
         try:
             if interaction.response.is_done():
-                await interaction.followup.send(embed=embed, ephemeral=True)
+                await followup(interaction, embed=embed, ephemeral=True)
             else:
                 await interaction.response.send_message(embed=embed, ephemeral=True)
         except Exception:
             # Last resort - try to send a simple message
             try:
-                await interaction.followup.send("❌ An error occurred. Please try again.", ephemeral=True)
+                await followup(interaction, "❌ An error occurred. Please try again.", ephemeral=True)
             except Exception:
                 pass  # Give up gracefully
     
@@ -172,7 +185,8 @@ class PandaBot(commands.Bot):
         
         if channel:
             try:
-                await channel.send(embed=welcome_embed)
+                # Optional background traffic: dropped if the outbound queue is backed up
+                await send_message(channel, embed=welcome_embed, shed=True)
             except Exception as e:
                 logging.warning(f"Could not send welcome message to {guild.name}: {e}")
     
@@ -180,15 +194,33 @@ class PandaBot(commands.Bot):
         """Enhanced cleanup when bot shuts down"""
         logging.info("🔄 Shutting down Panda Bot...")
         
-        # Close any HTTP sessions in cogs
-        for cog_name, cog in self.cogs.items():
-            try:
-                if hasattr(cog, 'panda_api') and hasattr(cog.panda_api, 'close'):
-                    await cog.panda_api.close()
-                if hasattr(cog, 'http') and hasattr(cog.http, 'close'):
-                    await cog.http.close()
-            except Exception as e:
-                logging.error(f"Error closing resources for {cog_name}: {e}")
+        # Let queued Discord messages go out while the connection is still open
+        try:
+            await outbound.close()
+        except Exception as e:
+            logging.error(f"Error draining outbound queue: {e}")
+        
+        # Stop prefetching and close the shared HTTP connection pool
+        try:
+            await self.panda_api.close()
+            await self.http_client.close()
+        except Exception as e:
+            logging.error(f"Error closing HTTP client: {e}")
+        
+        # Write any adoption changes still waiting in the write-behind buffer
+        try:
+            shutdown_adoption_data()
+        except Exception as e:
+            logging.error(f"Error flushing adoption data: {e}")
+        
+        # Fold the daily delivery log into config.json
+        try:
+            delivery_log.close()
+        except Exception as e:
+            logging.error(f"Error folding daily delivery log: {e}")
+        
+        # Drain the persistence thread so every queued snapshot reaches disk
+        persistence.stop()
         
         await super().close()
         logging.info("👋 Panda Bot shut down complete")
@@ -1,74 +1,329 @@
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import date
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
-from .config import adoption_data, save_adoption_data
+from .config import adoption_data, adoption_store, get_user_record, record_adoption_change, record_adoption_changes
+from .clock import now
+from .user_records import STARTING_CURRENCY
 
 logger = logging.getLogger(__name__)
 
 def get_user_currency(user_id: str) -> int:
     """Get user's bamboo coin balance"""
-    return adoption_data["user_currency"].get(user_id, 100)  # Default starting currency
+    if adoption_store:
+        return adoption_store.get_user_currency(user_id)
+    record = get_user_record(adoption_data, user_id)
+    return record.balance if record else STARTING_CURRENCY
 
 def add_user_currency(user_id: str, amount: int) -> None:
     """Add bamboo coins to user's balance"""
-    current = get_user_currency(user_id)
-    adoption_data["user_currency"][user_id] = current + amount
-    save_adoption_data(adoption_data)
+    if adoption_store:
+        adoption_store.add_user_currency(user_id, amount)
+        return
+    record = get_user_record(adoption_data, user_id, create=True)
+    record.balance += amount
+    record_adoption_change(user_id, "balance", record.balance)
 
 def subtract_user_currency(user_id: str, amount: int) -> bool:
     """Subtract bamboo coins from user's balance. Returns True if successful."""
-    current = get_user_currency(user_id)
-    if current >= amount:
-        adoption_data["user_currency"][user_id] = current - amount
-        save_adoption_data(adoption_data)
+    if adoption_store:
+        return adoption_store.subtract_user_currency(user_id, amount)
+    if get_user_currency(user_id) >= amount:
+        record = get_user_record(adoption_data, user_id, create=True)
+        record.balance -= amount
+        record_adoption_change(user_id, "balance", record.balance)
         return True
     return False
 
+class PandaCatalog:
+    """Index over adoption_data["available_pandas"].
+    
+    Lookups by ID go through a dict and the available pandas are kept as an
+    insertion-ordered set (a dict keyed by ID, in catalog order), so neither
+    depends on the size of the catalog. The catalog entries themselves stay
+    the same dicts that are saved to disk.
+    """
+    
+    def __init__(self, pandas: List[Dict[str, Any]]):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.position: Dict[str, int] = {}
+        self.available: Dict[str, Dict[str, Any]] = {}
+        self._available_list: Optional[List[Dict[str, Any]]] = None
+        for position, panda in enumerate(pandas):
+            self.by_id[panda["id"]] = panda
+            self.position[panda["id"]] = position
+            if panda["available"]:
+                self.available[panda["id"]] = panda
+    
+    def get(self, panda_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(panda_id)
+    
+    def available_pandas(self) -> List[Dict[str, Any]]:
+        """Available pandas in catalog order (cached until availability changes)"""
+        if self._available_list is None:
+            self._available_list = list(self.available.values())
+        return self._available_list
+    
+    def set_available(self, panda_id: str, available: bool) -> None:
+        """Flip a panda's availability and keep the index in sync"""
+        panda = self.by_id[panda_id]
+        panda["available"] = available
+        if available and panda_id not in self.available:
+            self.available[panda_id] = panda
+            # Re-sort only when a panda comes back, which keeps catalog order
+            self.available = dict(sorted(self.available.items(), key=lambda item: self.position[item[0]]))
+        elif not available:
+            self.available.pop(panda_id, None)
+        self._available_list = None
+
+# Built after any journal replay, so it reflects the loaded data
+catalog = PandaCatalog(adoption_data.get("available_pandas", []))
+
 def get_available_pandas() -> List[Dict[str, Any]]:
     """Get list of pandas available for adoption"""
-    return [p for p in adoption_data["available_pandas"] if p["available"]]
+    if adoption_store:
+        return adoption_store.get_available_pandas()
+    return catalog.available_pandas()
 
 def get_panda_by_id(panda_id: str) -> Optional[Dict[str, Any]]:
     """Get panda data by ID"""
-    for panda in adoption_data["available_pandas"]:
-        if panda["id"] == panda_id:
-            return panda
-    return None
+    if adoption_store:
+        return adoption_store.get_panda_by_id(panda_id)
+    return catalog.get(panda_id)
+
+def get_panda_name(panda_id: str, default: str = "Unknown") -> str:
+    """Get a panda's display name from the catalog"""
+    panda = get_panda_by_id(panda_id)
+    return panda["name"] if panda else default
+
+def new_adoption_record(panda_id: str) -> Dict[str, Any]:
+    """Build the initial record for a freshly adopted panda"""
+    timestamp = now()
+    return {
+        "panda_id": panda_id,
+        "adopted_date": timestamp,
+        "happiness": 100,
+        "last_fed": timestamp,
+        "last_played": timestamp
+    }
 
 def adopt_panda(user_id: str, panda_id: str) -> bool:
     """Adopt a panda. Returns True if successful."""
+    record = new_adoption_record(panda_id)
+    if adoption_store:
+        return adoption_store.adopt_panda(user_id, panda_id, record)
+
     panda = get_panda_by_id(panda_id)
     if not panda or not panda["available"]:
         return False
-    
+
     # Mark panda as adopted
-    panda["available"] = False
-    
+    catalog.set_available(panda_id, False)
+
     # Add to user's adoptions
-    if user_id not in adoption_data["adoptions"]:
-        adoption_data["adoptions"][user_id] = []
-    
-    adoption_data["adoptions"][user_id].append({
-        "panda_id": panda_id,
-        "adopted_date": datetime.utcnow().isoformat(),
-        "happiness": 100,
-        "last_fed": datetime.utcnow().isoformat(),
-        "last_played": datetime.utcnow().isoformat()
-    })
-    
-    save_adoption_data(adoption_data)
+    adoption_data["adoptions"].setdefault(user_id, {})[panda_id] = record
+
+    record_adoption_change(user_id, "adoption", record, panda_id)
     return True
 
 def get_user_pandas(user_id: str) -> List[Dict[str, Any]]:
     """Get user's adopted pandas"""
-    return adoption_data["adoptions"].get(user_id, [])
+    if adoption_store:
+        return adoption_store.get_user_pandas(user_id)
+    return list(adoption_data["adoptions"].get(user_id, {}).values())
+
+def get_owned_panda(user_id: str, panda_id: str) -> Optional[Dict[str, Any]]:
+    """Get the user's adoption record for a panda, or None if they don't own it"""
+    if adoption_store:
+        return adoption_store.get_owned_panda(user_id, panda_id)
+    return adoption_data["adoptions"].get(user_id, {}).get(panda_id)
 
 def update_panda_stats(user_id: str, panda_id: str, stat: str, value: Any) -> bool:
     """Update panda statistics. Returns True if successful."""
-    user_pandas = get_user_pandas(user_id)
-    for adopted_panda in user_pandas:
-        if adopted_panda["panda_id"] == panda_id:
-            adopted_panda[stat] = value
-            save_adoption_data(adoption_data)
+    if adoption_store:
+        return adoption_store.update_panda_stats(user_id, panda_id, stat, value)
+    adopted = get_owned_panda(user_id, panda_id)
+    if adopted is None:
+        return False
+    adopted[stat] = value
+    record_adoption_change(user_id, stat, value, panda_id)
+    return True
+
+def get_cooldown_timestamp(user_id: str, action: str) -> int:
+    """Get the epoch time of the user's last cooldown-limited action (e.g. "work"), 0 if never"""
+    if adoption_store:
+        return adoption_store.get_cooldown_timestamp(user_id, action)
+    record = get_user_record(adoption_data, user_id)
+    return getattr(record, f"last_{action}", 0) if record else 0
+
+def set_cooldown_timestamp(user_id: str, action: str, timestamp: int) -> None:
+    """Record when the user last performed a cooldown-limited action"""
+    if adoption_store:
+        adoption_store.set_cooldown_timestamp(user_id, action, timestamp)
+        return
+    setattr(get_user_record(adoption_data, user_id, create=True), f"last_{action}", timestamp)
+    record_adoption_change(user_id, f"last_{action}", timestamp)
+
+def iter_cooldowns() -> Iterator[Tuple[str, str, Optional[str], int]]:
+    """Yield every stored cooldown as (user_id, action, panda_id, last_used epoch)"""
+    if adoption_store:
+        yield from adoption_store.iter_cooldowns()
+        return
+    for user_id, record in adoption_data["users"].items():
+        for action in ("work", "daily"):
+            last_used = getattr(record, f"last_{action}")
+            if last_used:
+                yield str(user_id), action, None, last_used
+    for user_id, owned in adoption_data["adoptions"].items():
+        for panda_id, adopted in owned.items():
+            yield user_id, "feed", panda_id, adopted.get("last_fed", 0)
+            yield user_id, "play", panda_id, adopted.get("last_played", 0)
+
+def get_streak(user_id: str, action: str) -> Tuple[int, str]:
+    """Get the user's daily streak for an action as (count, last ISO date)"""
+    if adoption_store:
+        return adoption_store.get_streak(user_id, action)
+    record = get_user_record(adoption_data, user_id)
+    if not record:
+        return 0, ""
+    last_day = getattr(record, f"last_{action}_day")
+    return getattr(record, f"{action}_streak"), date.fromordinal(last_day).isoformat() if last_day else ""
+
+def set_streak(user_id: str, action: str, count: int, last_date: str) -> None:
+    """Update the user's daily streak for an action"""
+    if adoption_store:
+        adoption_store.set_streak(user_id, action, count, last_date)
+        return
+    record_adoption_changes(_stage_streak(get_user_record(adoption_data, user_id, create=True), user_id, action, count, last_date))
+
+def _stage_streak(record, user_id: str, action: str, count: int, last_date: str) -> List[Tuple[str, Optional[str], str, Any]]:
+    """Apply a streak to a user record and return the journal changes for it"""
+    last_day = date.fromisoformat(last_date).toordinal() if last_date else 0
+    setattr(record, f"{action}_streak", count)
+    setattr(record, f"last_{action}_day", last_day)
+    return [
+        (user_id, None, f"{action}_streak", count),
+        (user_id, None, f"last_{action}_day", last_day)
+    ]
+
+class AdoptionTransaction:
+    """Stage several changes for one user and persist them all-or-nothing.
+    
+    Usage:
+        with adoption_transaction(user_id) as txn:
+            txn.subtract_currency(150)
+            txn.adopt("panda_001")
+            txn.update_panda("panda_001", level=1, experience=0)
+        if txn.committed:
+            ...
+    
+    The commit fails (and nothing is changed) if the balance would go negative,
+    the panda to adopt is not available, or a staged panda is not owned by the user.
+    """
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.currency_delta = 0
+        self.adopt_panda_id: Optional[str] = None
+        self.panda_updates: Dict[str, Dict[str, Any]] = {}
+        self.streaks: Dict[str, Tuple[int, str]] = {}
+        self.cooldowns: Dict[str, int] = {}
+        self.committed = False
+    
+    def __enter__(self) -> "AdoptionTransaction":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None and not self.committed:
+            self.commit()
+        return False
+    
+    def add_currency(self, amount: int) -> None:
+        """Stage bamboo coins to add"""
+        self.currency_delta += amount
+    
+    def subtract_currency(self, amount: int) -> None:
+        """Stage bamboo coins to spend; the commit fails if the balance is too low"""
+        self.currency_delta -= amount
+    
+    def adopt(self, panda_id: str) -> None:
+        """Stage the adoption of an available panda"""
+        self.adopt_panda_id = panda_id
+    
+    def update_panda(self, panda_id: str, **stats: Any) -> None:
+        """Stage statistic updates for one of the user's pandas"""
+        self.panda_updates.setdefault(panda_id, {}).update(stats)
+    
+    def set_streak(self, action: str, count: int, last_date: str) -> None:
+        """Stage a daily streak update"""
+        self.streaks[action] = (count, last_date)
+    
+    def set_cooldown(self, action: str, timestamp: int) -> None:
+        """Stage the epoch time of a cooldown-limited action"""
+        self.cooldowns[action] = timestamp
+    
+    def commit(self) -> bool:
+        """Apply all staged changes with a single write. Returns True if successful."""
+        if self.committed:
             return True
-    return False
\ No newline at end of file
+        
+        record = None
+        if self.adopt_panda_id:
+            record = new_adoption_record(self.adopt_panda_id)
+            record.update(self.panda_updates.get(self.adopt_panda_id, {}))
+        
+        if adoption_store:
+            self.committed = adoption_store.apply_transaction(self, record)
+            return self.committed
+        
+        user_id = self.user_id
+        balance = get_user_currency(user_id) + self.currency_delta
+        if balance < 0:
+            return False
+        
+        panda = None
+        if self.adopt_panda_id:
+            panda = get_panda_by_id(self.adopt_panda_id)
+            if not panda or not panda["available"]:
+                return False
+        
+        owned = {}
+        for panda_id in self.panda_updates:
+            if panda_id == self.adopt_panda_id:
+                continue
+            adopted = get_owned_panda(user_id, panda_id)
+            if adopted is None:
+                return False
+            owned[panda_id] = adopted
+        
+        # Everything is validated - apply in memory and persist once
+        changes = []
+        user_record = get_user_record(adoption_data, user_id, create=True)
+        if self.currency_delta:
+            user_record.balance = balance
+            changes.append((user_id, None, "balance", balance))
+        
+        if panda is not None:
+            catalog.set_available(self.adopt_panda_id, False)
+            adoption_data["adoptions"].setdefault(user_id, {})[self.adopt_panda_id] = record
+            changes.append((user_id, self.adopt_panda_id, "adoption", record))
+        
+        for panda_id, adopted in owned.items():
+            for stat, value in self.panda_updates[panda_id].items():
+                adopted[stat] = value
+                changes.append((user_id, panda_id, stat, value))
+        
+        for action, (count, last_date) in self.streaks.items():
+            changes.extend(_stage_streak(user_record, user_id, action, count, last_date))
+        
+        for action, timestamp in self.cooldowns.items():
+            setattr(user_record, f"last_{action}", timestamp)
+            changes.append((user_id, None, f"last_{action}", timestamp))
+        
+        if changes:
+            record_adoption_changes(changes)
+        self.committed = True
+        return True
+
+def adoption_transaction(user_id: str) -> AdoptionTransaction:
+    """Start a transaction for one user's adoption data (use as a context manager)"""
+    return AdoptionTransaction(user_id)
@@ -0,0 +1,52 @@
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any
+
+# 1970-01-01 as a date ordinal, so epoch days convert to date ordinals by addition
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_lock = threading.Lock()
+_last_now = 0
+
+def now() -> int:
+    """Current UTC time as integer epoch seconds.
+
+    Never goes backwards: if the system clock is stepped back (NTP correction,
+    manual change) the previous value is returned until the clock catches up,
+    so elapsed-time checks can't go negative and cooldowns can't be reset.
+    """
+    global _last_now
+    current = int(time.time())
+    with _lock:
+        if current > _last_now:
+            _last_now = current
+        return _last_now
+
+def elapsed_since(timestamp: int) -> int:
+    """Seconds since an epoch timestamp (0 for timestamps in the future)"""
+    return max(0, now() - timestamp)
+
+def today() -> int:
+    """Current UTC date as a date ordinal"""
+    return now() // 86400 + EPOCH_ORDINAL
+
+def iso_to_epoch(value: str) -> int:
+    """Convert a naive UTC ISO timestamp to epoch seconds"""
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+def epoch_to_iso(value: int) -> str:
+    """Convert epoch seconds to a naive UTC ISO timestamp"""
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None).isoformat()
+
+def to_epoch(value: Any) -> int:
+    """Normalize a stored timestamp (epoch number or legacy ISO string) to epoch seconds"""
+    if isinstance(value, str):
+        if value.isdigit():
+            return int(value)
+        return iso_to_epoch(value) if value else 0
+    return int(value or 0)
+
+def format_epoch(timestamp: int, fmt: str = "%Y-%m-%d %H:%M UTC") -> str:
+    """Format an epoch timestamp for display"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(fmt)
@@ -0,0 +1,40 @@
+import json
+from typing import Any, Callable, Optional, Union
+
+# orjson is optional: it is several times faster at both encoding and decoding
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+def dumps(obj: Any, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode to UTF-8 JSON bytes.
+
+    Output is compact unless pretty=True (2-space indent, for files people edit
+    by hand). Non-string dict keys are converted to strings like stdlib json does.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode("utf-8")
+
+def dumps_text(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode to a compact JSON string (for text columns and line-based files)"""
+    return dumps(obj, default=default).decode("utf-8")
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def load_file(path: str) -> Any:
+    """Read and decode a JSON file"""
+    with open(path, "rb") as f:
+        return loads(f.read())
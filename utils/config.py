@@ -1,7 +1,16 @@
-import json
+import asyncio
+import copy
 import os
+import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, List, Tuple
+from . import codec
+from .persistence import persistence
+from .user_records import (
+    PANDA_TIMESTAMP_FIELDS, UserRecord, load_user_records, migrate_panda_timestamps, parse_legacy_key
+)
+from .clock import to_epoch
+from .guild_settings import GuildSettings, load_guild_settings
 
 logger = logging.getLogger(__name__)
 
@@ -9,15 +18,33 @@ logger = logging.getLogger(__name__)
 CONFIG_PATH = os.getenv("CONFIG_PATH", "config.json")
 ADOPTION_PATH = os.getenv("ADOPTION_PATH", "adoption_data.json")
 
+# Adoption storage engine: "json" (default), "journal" or "sqlite"
+ADOPTION_BACKEND = os.getenv("ADOPTION_BACKEND", "json").lower()
+ADOPTION_DB_PATH = os.getenv("ADOPTION_DB_PATH", "adoption_data.db")
+
+# Journal mode: append-only change log folded into ADOPTION_PATH by the compactor
+ADOPTION_JOURNAL_PATH = os.getenv("ADOPTION_JOURNAL_PATH", f"{ADOPTION_PATH}.journal")
+ADOPTION_COMPACT_INTERVAL = float(os.getenv("ADOPTION_COMPACT_INTERVAL", "300"))
+ADOPTION_JOURNAL_MAX_BYTES = int(os.getenv("ADOPTION_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+
+# Write-behind settings for adoption data (seconds)
+ADOPTION_FLUSH_DELAY = float(os.getenv("ADOPTION_FLUSH_DELAY", "2"))
+ADOPTION_MAX_STALENESS = float(os.getenv("ADOPTION_MAX_STALENESS", "10"))
+
 # Default configurations
 DEFAULT_CONFIG = {
     "daily_channel_id": None,
     "daily_time": os.getenv("DEFAULT_DAILY_TIME", "12:00"),
     "timezone": os.getenv("DEFAULT_TIMEZONE", "UTC"),
-    "enabled": False
+    "enabled": False,
+    # Per-guild daily settings keyed by int guild id (see utils.guild_settings).
+    # The global daily_* keys above are defaults for new guilds; a legacy
+    # daily_channel_id is moved into its guild's settings once the bot is ready.
+    "guilds": {}
 }
 
 DEFAULT_ADOPTION_DATA = {
+    # user_id -> {panda_id: adoption record} in adoption order (a list per user on disk)
     "adoptions": {},
     "available_pandas": [
         {
@@ -76,65 +103,393 @@ DEFAULT_ADOPTION_DATA = {
             "available": True
         }
     ],
-    "user_currency": {}
+    # Per-user economy records keyed by int user id (see utils.user_records)
+    "users": {}
 }
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from file"""
     if not os.path.exists(CONFIG_PATH):
         save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG)
     
     try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            merged = DEFAULT_CONFIG.copy()
-            merged.update(data or {})
-            return merged
+        data = codec.load_file(CONFIG_PATH)
+        merged = copy.deepcopy(DEFAULT_CONFIG)
+        merged.update(data or {})
+        merged["guilds"] = load_guild_settings(merged["guilds"])
+        return merged
     except Exception as e:
         logger.error(f"Failed to load config.json: {e}. Using defaults.")
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG)
 
-def save_config(data: Dict[str, Any]) -> None:
-    """Save configuration to file"""
+def save_config(data: Dict[str, Any], on_done: Optional[Callable[[bool], None]] = None) -> bool:
+    """Save configuration to file (written by the persistence thread).
+    
+    Returns True once queued; on_done(ok) is called from the persistence thread after the write.
+    """
     try:
-        tmp_path = f"{CONFIG_PATH}.tmp"
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        os.replace(tmp_path, CONFIG_PATH)
+        # Kept indented: config.json is meant to be edited by hand
+        return persistence.submit(CONFIG_PATH, codec.dumps(data, pretty=True, default=_encode_config_value), on_done=on_done)
     except Exception as e:
         logger.error(f"Failed to save config.json: {e}")
+        return False
+
+def _encode_config_value(value: Any) -> Any:
+    """JSON fallback encoder for config data"""
+    if isinstance(value, GuildSettings):
+        return value.to_dict()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def get_guild_settings(guild_id: int, create: bool = False) -> Optional[GuildSettings]:
+    """Look up a guild's daily settings (new guilds start from the global defaults)"""
+    guilds = config_data["guilds"]
+    settings = guilds.get(int(guild_id))
+    if settings is None and create:
+        settings = guilds[int(guild_id)] = GuildSettings(config_data["daily_time"], config_data["timezone"])
+    return settings
 
 def load_adoption_data() -> Dict[str, Any]:
     """Load adoption data from file"""
     if not os.path.exists(ADOPTION_PATH):
         save_adoption_data(DEFAULT_ADOPTION_DATA)
-        return DEFAULT_ADOPTION_DATA.copy()
+        return copy.deepcopy(DEFAULT_ADOPTION_DATA)
     
     try:
-        with open(ADOPTION_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Merge with defaults to ensure all keys exist
-            merged = DEFAULT_ADOPTION_DATA.copy()
-            if data:
-                merged["adoptions"] = data.get("adoptions", {})
-                merged["available_pandas"] = data.get("available_pandas", DEFAULT_ADOPTION_DATA["available_pandas"])
-                merged["user_currency"] = data.get("user_currency", {})
-            return merged
+        data = codec.load_file(ADOPTION_PATH)
+        # Merge with defaults to ensure all keys exist
+        merged = copy.deepcopy(DEFAULT_ADOPTION_DATA)
+        if data:
+            merged["adoptions"] = {
+                user_id: index_user_pandas(user_pandas)
+                for user_id, user_pandas in data.get("adoptions", {}).items()
+            }
+            merged["available_pandas"] = data.get("available_pandas", merged["available_pandas"])
+            # Older files keep balances, cooldowns and streaks as flat "user_currency" keys
+            merged["users"] = load_user_records(data.get("users", {}), data.get("user_currency"))
+        return merged
     except Exception as e:
         logger.error(f"Failed to load adoption_data.json: {e}. Using defaults.")
-        return DEFAULT_ADOPTION_DATA.copy()
+        return copy.deepcopy(DEFAULT_ADOPTION_DATA)
 
-def save_adoption_data(data: Dict[str, Any]) -> None:
-    """Save adoption data to file"""
+def save_adoption_data(data: Dict[str, Any], wait: bool = False,
+                       on_done: Optional[Callable[[bool], None]] = None) -> bool:
+    """Save adoption data to file (written by the persistence thread).
+    
+    Returns True once the snapshot is queued, or with wait=True once it is on disk.
+    on_done(ok) is called from the persistence thread after the write.
+    """
     try:
-        tmp_path = f"{ADOPTION_PATH}.tmp"
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        os.replace(tmp_path, ADOPTION_PATH)
+        snapshot = dict(data)
+        snapshot["adoptions"] = {
+            user_id: list(owned.values()) for user_id, owned in data.get("adoptions", {}).items()
+        }
+        payload = codec.dumps(snapshot, default=_encode_adoption_value)
     except Exception as e:
-        logger.error(f"Failed to save adoption_data.json: {e}")
+        logger.error(f"Failed to serialize adoption data: {e}")
+        return False
+    return persistence.submit(ADOPTION_PATH, payload, wait=wait, on_done=on_done)
+
+def index_user_pandas(user_pandas: Any) -> Dict[str, Dict[str, Any]]:
+    """Key a user's adoption records by panda_id, keeping adoption order.
+    
+    Also migrates ISO timestamps written by older versions to epoch seconds.
+    """
+    if isinstance(user_pandas, dict):
+        return user_pandas
+    for adopted in user_pandas:
+        migrate_panda_timestamps(adopted)
+    return {adopted["panda_id"]: adopted for adopted in user_pandas}
+
+def _encode_adoption_value(value: Any) -> Any:
+    """JSON fallback encoder for adoption data"""
+    if isinstance(value, UserRecord):
+        return value.to_dict()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def get_user_record(data: Dict[str, Any], user_id: str, create: bool = False) -> Optional[UserRecord]:
+    """Look up a user's record in the in-memory index"""
+    users = data["users"]
+    record = users.get(int(user_id))
+    if record is None and create:
+        record = users[int(user_id)] = UserRecord()
+    return record
+
+# Write-behind state: monotonic times of the first and latest unsaved change
+_dirty_since: Optional[float] = None
+_last_change: Optional[float] = None
+_flush_task: Optional[asyncio.Task] = None
+
+def mark_adoption_dirty() -> None:
+    """Schedule a coalesced write of adoption data.
+    
+    Changes are written once no new change arrived for ADOPTION_FLUSH_DELAY
+    seconds, but never later than ADOPTION_MAX_STALENESS seconds after the
+    first unsaved change. Without a running event loop the data is saved
+    immediately.
+    """
+    global _dirty_since, _last_change, _flush_task
+    now = time.monotonic()
+    if _dirty_since is None:
+        _dirty_since = now
+    _last_change = now
+    
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_adoption_data()
+        return
+    
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(_adoption_flusher())
+
+async def _adoption_flusher() -> None:
+    """Background task that writes adoption data once a burst of changes settles"""
+    while _dirty_since is not None:
+        deadline = min(_last_change + ADOPTION_FLUSH_DELAY, _dirty_since + ADOPTION_MAX_STALENESS)
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            continue
+        if not flush_adoption_data():
+            # Keep the data dirty and retry after the normal delay
+            await asyncio.sleep(ADOPTION_FLUSH_DELAY)
+
+def flush_adoption_data() -> bool:
+    """Write pending adoption changes to disk now. Returns True if nothing is left unsaved."""
+    global _dirty_since, _last_change
+    if _dirty_since is None:
+        return True
+    
+    pending_since = _dirty_since
+    _dirty_since = None
+    if save_adoption_data(adoption_data):
+        return True
+    
+    _dirty_since = pending_since
+    _last_change = time.monotonic()
+    return False
+
+# ==========================================
+# Journal mode
+# ==========================================
+# A change is (user_id, panda_id, field, value). panda_id is None for
+# UserRecord fields such as "balance", "last_work" or "feed_streak", and the
+# field "adoption" carries a complete new adoption record. Values are absolute,
+# so replaying a change twice is harmless.
+AdoptionChange = Tuple[str, Optional[str], str, Any]
+
+_journal_file = None
+_compact_task: Optional[asyncio.Task] = None
+# Number of the newest rotated journal segment (ADOPTION_JOURNAL_PATH.<n>)
+_journal_segment = 0
+
+def record_adoption_change(user_id: str, field: str, value: Any, panda_id: Optional[str] = None) -> None:
+    """Persist a single change to adoption data"""
+    record_adoption_changes([(user_id, panda_id, field, value)])
+
+def record_adoption_changes(changes: List[AdoptionChange]) -> None:
+    """Persist changes already applied to adoption_data.
+    
+    In journal mode the changes are appended as one line to the journal and
+    synced to disk before returning; otherwise a coalesced snapshot is scheduled.
+    """
+    if ADOPTION_BACKEND != "journal":
+        mark_adoption_dirty()
+        return
+    
+    records = []
+    for user_id, panda_id, field, value in changes:
+        record = {"u": user_id, "f": field, "v": value}
+        if panda_id is not None:
+            record["p"] = panda_id
+        records.append(record)
+    
+    global _journal_file
+    try:
+        if _journal_file is None:
+            _journal_file = open(ADOPTION_JOURNAL_PATH, "a", encoding="utf-8")
+        _journal_file.write(codec.dumps_text(records) + "\n")
+        _journal_file.flush()
+        os.fsync(_journal_file.fileno())
+    except Exception as e:
+        logger.error(f"Failed to append to adoption journal: {e}. Falling back to a full save.")
+        mark_adoption_dirty()
+        return
+    
+    if _journal_file.tell() >= ADOPTION_JOURNAL_MAX_BYTES:
+        compact_adoption_journal()
+    _ensure_compactor()
+
+def apply_adoption_change(data: Dict[str, Any], user_id: str, panda_id: Optional[str], field: str, value: Any) -> None:
+    """Apply one journaled change to in-memory adoption data"""
+    if field == "adoption":
+        migrate_panda_timestamps(value)
+        data["adoptions"].setdefault(user_id, {}).setdefault(panda_id, value)
+        for panda in data["available_pandas"]:
+            if panda["id"] == panda_id:
+                panda["available"] = False
+    elif panda_id is not None:
+        adopted = data["adoptions"].get(user_id, {}).get(panda_id)
+        if adopted is not None:
+            adopted[field] = to_epoch(value) if field in PANDA_TIMESTAMP_FIELDS else value
+    else:
+        if field != "balance":
+            # Normalizes field names written by older versions, e.g. "last_feed_date"
+            parsed = parse_legacy_key(f"{field}_{user_id}")
+            field = parsed[1] if parsed else field
+        get_user_record(data, user_id, create=True).set_field(field, value)
+
+def _journal_segments() -> List[Tuple[int, str]]:
+    """Rotated journal segments not yet covered by a snapshot on disk, oldest first"""
+    directory = os.path.dirname(os.path.abspath(ADOPTION_JOURNAL_PATH))
+    prefix = os.path.basename(ADOPTION_JOURNAL_PATH) + "."
+    segments = []
+    for name in os.listdir(directory):
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and suffix.isdigit():
+            segments.append((int(suffix), os.path.join(directory, name)))
+    return sorted(segments)
+
+def _drop_journal_segments(upto: int) -> None:
+    """Delete rotated segments up to number `upto` (their changes are in the snapshot)"""
+    for number, path in _journal_segments():
+        if number <= upto:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error(f"Failed to remove adoption journal segment {path}: {e}")
+
+def _replay_journal_file(data: Dict[str, Any], path: str) -> int:
+    applied = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            try:
+                records = codec.loads(line)
+            except ValueError:
+                # A torn final line means the write was never acknowledged
+                logger.warning(f"Ignoring incomplete adoption journal entry in {path} at line {line_no}")
+                break
+            for record in records:
+                apply_adoption_change(data, record["u"], record.get("p"), record["f"], record["v"])
+                applied += 1
+    return applied
+
+def replay_adoption_journal(data: Dict[str, Any]) -> int:
+    """Apply journaled changes (rotated segments, then the live journal) on top of a
+    loaded snapshot. Returns the number of changes applied."""
+    global _journal_segment
+    applied = 0
+    for number, path in _journal_segments():
+        _journal_segment = max(_journal_segment, number)
+        applied += _replay_journal_file(data, path)
+    if os.path.exists(ADOPTION_JOURNAL_PATH):
+        applied += _replay_journal_file(data, ADOPTION_JOURNAL_PATH)
+    return applied
+
+def compact_adoption_journal() -> bool:
+    """Rotate the journal and queue a snapshot that replaces it. Returns True if queued.
+    
+    The live journal becomes segment ADOPTION_JOURNAL_PATH.<n> and new changes
+    go to a fresh file. The snapshot is written without blocking the caller;
+    once it is on disk the persistence thread deletes the segments it covers.
+    Until then startup replays them, so no change is lost in between.
+    """
+    global _journal_file, _journal_segment
+    try:
+        if _journal_file is not None:
+            _journal_file.close()
+            _journal_file = None
+        if os.path.exists(ADOPTION_JOURNAL_PATH):
+            _journal_segment += 1
+            os.replace(ADOPTION_JOURNAL_PATH, f"{ADOPTION_JOURNAL_PATH}.{_journal_segment}")
+        _journal_file = open(ADOPTION_JOURNAL_PATH, "a", encoding="utf-8")
+    except Exception as e:
+        logger.error(f"Failed to rotate adoption journal: {e}")
+        return False
+    
+    segment = _journal_segment
+    def on_written(ok: bool) -> None:
+        # A failed write keeps the segments; the next compaction's snapshot covers them
+        if ok:
+            _drop_journal_segments(segment)
+    return save_adoption_data(adoption_data, on_done=on_written)
+
+def _ensure_compactor() -> None:
+    """Start the periodic journal compactor if an event loop is running"""
+    global _compact_task
+    if _compact_task is not None and not _compact_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _compact_task = loop.create_task(_journal_compactor())
+
+async def _journal_compactor() -> None:
+    """Background task that periodically folds the journal into a snapshot"""
+    while True:
+        await asyncio.sleep(ADOPTION_COMPACT_INTERVAL)
+        if _journal_file is not None and _journal_file.tell() > 0:
+            compact_adoption_journal()
+
+def load_journaled_adoption_data() -> Dict[str, Any]:
+    """Load the snapshot, replay the journal and fold it into a new snapshot"""
+    data = load_adoption_data()
+    try:
+        replayed = replay_adoption_journal(data)
+    except Exception as e:
+        logger.error(f"Failed to replay adoption journal: {e}")
+        return data
+    
+    if replayed or _journal_segment:
+        logger.info(f"Replayed {replayed} journaled adoption changes")
+        # Startup runs before the event loop, so waiting for the write stalls nothing
+        if save_adoption_data(data, wait=True):
+            _drop_journal_segments(_journal_segment)
+            try:
+                open(ADOPTION_JOURNAL_PATH, "w").close()
+            except Exception as e:
+                logger.error(f"Failed to reset adoption journal: {e}")
+    return data
+
+def shutdown_adoption_data() -> None:
+    """Stop background persistence tasks and write any pending changes"""
+    global _flush_task, _compact_task, _journal_file
+    for task in (_flush_task, _compact_task):
+        if task is not None and not task.done():
+            task.cancel()
+    _flush_task = None
+    _compact_task = None
+    flush_adoption_data()
+    
+    if _journal_file is not None:
+        if _journal_file.tell() > 0:
+            compact_adoption_journal()
+        _journal_file.close()
+        _journal_file = None
+    
+    if adoption_store is not None:
+        adoption_store.close()
+
+def open_adoption_store():
+    """Open the SQLite adoption store, migrating adoption_data.json on first use"""
+    from .sqlite_store import SQLiteAdoptionStore
+    return SQLiteAdoptionStore(
+        ADOPTION_DB_PATH,
+        default_pandas=DEFAULT_ADOPTION_DATA["available_pandas"],
+        legacy_json_path=ADOPTION_PATH
+    )
 
 # Initialize data at module load
 config_data = load_config()
-adoption_data = load_adoption_data()
\ No newline at end of file
+if ADOPTION_BACKEND == "sqlite":
+    # Rows are read on demand; the JSON file is not parsed at startup
+    adoption_store = open_adoption_store()
+    adoption_data: Dict[str, Any] = {}
+elif ADOPTION_BACKEND == "journal":
+    adoption_store = None
+    adoption_data = load_journaled_adoption_data()
+else:
+    adoption_store = None
+    adoption_data = load_adoption_data()
\ No newline at end of file
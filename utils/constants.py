@@ -19,6 +19,13 @@ PANDA_JOKES = [
     "What's a panda's favorite dance? The bamboo-cha!",
 ]
 
+# (content, author) used when the quotes API is unavailable
+PANDA_QUOTES = [
+    ("The best time to plant a tree was 20 years ago. The second best time is now.", "Chinese Proverb"),
+    ("Be not afraid of growing slowly, be afraid only of standing still.", "Chinese Proverb"),
+    ("Happiness is not something ready made. It comes from your own actions.", "Dalai Lama"),
+]
+
 PANDA_NAMES = [
     "Bao Bao", "Xiao Liwu", "Mei Xiang", "Tian Tian", "Lun Lun", "Yang Yang", "Bei Bei", "Yuan Zi",
     "Hua Mei", "Tai Shan", "Gu Gu", "Pan Pan", "Ling Ling", "Shuang Shuang", "Qin Qin", "Xiong Xiong"
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import random
+import logging
+from typing import Dict, Any, List, Optional, Set
+from . import codec
+from .clock import now
+from .persistence import persistence
+
+logger = logging.getLogger(__name__)
+
+CONTENT_CACHE_PATH = os.getenv("CONTENT_CACHE_PATH", "content_cache.json")
+# Seconds a cached quote/joke/fact stays servable after it was last fetched
+CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", "604800"))
+# Max items kept per kind (oldest fetched are evicted first)
+CONTENT_CACHE_MAX_ITEMS = int(os.getenv("CONTENT_CACHE_MAX_ITEMS", "500"))
+# Seconds to batch cache changes before writing the file
+CONTENT_CACHE_SAVE_DELAY = float(os.getenv("CONTENT_CACHE_SAVE_DELAY", "30"))
+
+class _Kind:
+    """Cached items of one kind plus the deck of items not served this cycle"""
+
+    __slots__ = ("items", "deck", "queued", "hits", "misses", "cycles")
+
+    def __init__(self):
+        # key -> {"value": ..., "expires": epoch}; insertion ordered by fetch time
+        self.items: Dict[str, Dict[str, Any]] = {}
+        # Keys not yet served this cycle; deck may hold stale keys that are no longer queued
+        self.deck: List[str] = []
+        self.queued: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.cycles = 0
+
+class ContentCache:
+    """Disk-backed TTL cache for fetched quotes, jokes and facts.
+
+    take() samples without repeats: every fresh item is served once before
+    any is served again. Items survive restarts, so commands are answered
+    from the cache immediately and upstream calls only top it up.
+    """
+
+    def __init__(self, path: str = CONTENT_CACHE_PATH, ttl: int = CONTENT_CACHE_TTL,
+                 max_items: int = CONTENT_CACHE_MAX_ITEMS):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.kinds: Dict[str, _Kind] = {}
+        self.save_handle: Optional[asyncio.TimerHandle] = None
+        self.load()
+
+    def _kind(self, kind: str) -> _Kind:
+        entry = self.kinds.get(kind)
+        if entry is None:
+            entry = self.kinds[kind] = _Kind()
+        return entry
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = codec.load_file(self.path)
+            current = now()
+            for kind, stored in data.items():
+                entry = self._kind(kind)
+                for item in stored:
+                    if item.get("expires", 0) > current:
+                        key = self._key(item["value"])
+                        entry.items[key] = {"value": item["value"], "expires": item["expires"]}
+                        if not item.get("served"):
+                            entry.deck.append(key)
+                            entry.queued.add(key)
+            loaded = {kind: len(entry.items) for kind, entry in self.kinds.items()}
+            logger.info(f"Loaded content cache: {loaded}")
+        except Exception as e:
+            logger.error(f"Failed to load {self.path}: {e}. Starting with an empty content cache.")
+
+    def save(self) -> bool:
+        """Queue the cache for writing by the persistence thread"""
+        self.save_handle = None
+        data = {}
+        for kind, entry in self.kinds.items():
+            data[kind] = [
+                {"value": item["value"], "expires": item["expires"], "served": key not in entry.queued}
+                for key, item in entry.items.items()
+            ]
+        return persistence.submit(self.path, codec.dumps(data))
+
+    def _schedule_save(self) -> None:
+        if self.save_handle is None:
+            try:
+                self.save_handle = asyncio.get_running_loop().call_later(CONTENT_CACHE_SAVE_DELAY, self.save)
+            except RuntimeError:
+                self.save()
+
+    def close(self) -> None:
+        """Write pending changes now"""
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+            self.save()
+
+    @staticmethod
+    def _key(value: Any) -> str:
+        return value if isinstance(value, str) else codec.dumps_text(value)
+
+    def add(self, kind: str, value: Any, served: bool = False) -> bool:
+        """Store a fetched item (refreshing its TTL if known). Returns True if it was new.
+
+        served=True records that the caller is showing the item right now, so
+        it is not drawn again this cycle.
+        """
+        entry = self._kind(kind)
+        key = self._key(value)
+        is_new = entry.items.pop(key, None) is None
+        entry.items[key] = {"value": value, "expires": now() + self.ttl}
+        if served:
+            entry.queued.discard(key)
+        elif is_new:
+            entry.deck.append(key)
+            entry.queued.add(key)
+        while len(entry.items) > self.max_items:
+            evicted = next(iter(entry.items))
+            del entry.items[evicted]
+            entry.queued.discard(evicted)
+        self._schedule_save()
+        return is_new
+
+    def take(self, kind: str) -> Optional[Any]:
+        """A random fresh item not served since the last cycle (None if none are cached)"""
+        entry = self._kind(kind)
+        current = now()
+        for _ in range(2):
+            while entry.deck:
+                index = random.randrange(len(entry.deck))
+                entry.deck[index], entry.deck[-1] = entry.deck[-1], entry.deck[index]
+                key = entry.deck.pop()
+                if key not in entry.queued:
+                    continue
+                entry.queued.discard(key)
+                item = entry.items.get(key)
+                if item is None:
+                    continue
+                if item["expires"] <= current:
+                    del entry.items[key]
+                    continue
+                entry.hits += 1
+                self._schedule_save()
+                return item["value"]
+            # Everything fresh has been served once - start a new cycle
+            self._expire(entry, current)
+            if not entry.items:
+                break
+            entry.deck = list(entry.items)
+            entry.queued = set(entry.deck)
+            entry.cycles += 1
+        entry.misses += 1
+        return None
+
+    def unserved(self, kind: str) -> int:
+        """Items left before the current cycle runs out"""
+        return len(self._kind(kind).queued)
+
+    def _expire(self, entry: _Kind, current: int) -> None:
+        for key in [key for key, item in entry.items.items() if item["expires"] <= current]:
+            del entry.items[key]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for kind, entry in self.kinds.items():
+            served = entry.hits + entry.misses
+            result[kind] = {
+                "items": len(entry.items),
+                "unserved": len(entry.queued),
+                "cycles": entry.cycles,
+                "hit_rate": entry.hits / served if served else 0.0,
+            }
+        return result
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import logging
+from typing import Dict, List, Optional, Tuple
+from .adoption_helpers import get_cooldown_timestamp, get_owned_panda, iter_cooldowns
+from .clock import now
+
+logger = logging.getLogger(__name__)
+
+# Cooldown length in seconds per action
+COOLDOWNS: Dict[str, int] = {
+    "feed": 3600,   # 1 hour
+    "play": 2700,   # 45 minutes
+    "work": 1800,   # 30 minutes
+    "daily": 86400  # 24 hours
+}
+
+# Per-panda actions and the adoption record field holding their last use
+PANDA_ACTIONS = {"feed": "last_fed", "play": "last_played"}
+
+# (user_id, action, panda_id); panda_id is None for user-level actions
+CooldownKey = Tuple[str, str, Optional[str]]
+
+class CooldownManager:
+    """Cooldown checks for feed/play/work/daily.
+
+    Running cooldowns are cached per key so remaining() is a dict lookup
+    after the first check (which reads the stored last-use time); inactive
+    ones are not cached, so memory tracks only active cooldowns. Active
+    cooldowns are also kept in a min-heap ordered by expiry, so
+    ready_within() only visits entries that expire inside the requested window.
+    """
+
+    def __init__(self, durations: Dict[str, int] = COOLDOWNS):
+        self.durations = dict(durations)
+        self.expiries: Dict[CooldownKey, int] = {}
+        self.heap: List[Tuple[int, int, CooldownKey]] = []
+        self.counter = itertools.count()
+        self.seeded = False
+
+    def duration(self, action: str) -> int:
+        return self.durations[action]
+
+    def remaining(self, user_id: str, action: str, panda_id: Optional[str] = None) -> int:
+        """Seconds until the action is available again (0 if ready)"""
+        return max(0, self.expires_at(user_id, action, panda_id) - now())
+
+    def expires_at(self, user_id: str, action: str, panda_id: Optional[str] = None) -> int:
+        """Epoch time the cooldown ends (0 if the action was never used)"""
+        key = (user_id, action, panda_id)
+        current = now()
+        expiry = self.expiries.get(key)
+        if expiry is not None:
+            if expiry > current:
+                return expiry
+            # Ended since it was cached; its heap entry is skipped when pruned
+            del self.expiries[key]
+            return expiry
+        last_used = self._last_used(user_id, action, panda_id)
+        expiry = last_used + self.durations[action] if last_used else 0
+        self._set(key, expiry)
+        return expiry
+
+    def record(self, user_id: str, action: str, timestamp: int, panda_id: Optional[str] = None) -> None:
+        """Start a cooldown after the action was committed at timestamp"""
+        self._set((user_id, action, panda_id), timestamp + self.durations[action])
+
+    def ready_within(self, seconds: int) -> List[Tuple[int, str, str, Optional[str]]]:
+        """Cooldowns ending in the next `seconds`, as sorted (expiry, user_id, action, panda_id)"""
+        self._seed()
+        current = now()
+        self._prune(current)
+        horizon = current + seconds
+
+        # Walk the heap as a tree; a node past the horizon has no earlier children
+        ready = []
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            if index >= len(self.heap):
+                continue
+            expiry, _, key = self.heap[index]
+            if expiry > horizon:
+                continue
+            if self.expiries.get(key) == expiry:
+                ready.append((expiry, *key))
+            stack.extend((2 * index + 1, 2 * index + 2))
+        ready.sort(key=lambda entry: entry[0])
+        return ready
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracked": len(self.expiries), "heap_size": len(self.heap)}
+
+    def _last_used(self, user_id: str, action: str, panda_id: Optional[str]) -> int:
+        field = PANDA_ACTIONS.get(action)
+        if field:
+            adopted = get_owned_panda(user_id, panda_id)
+            return adopted.get(field, 0) if adopted else 0
+        return get_cooldown_timestamp(user_id, action)
+
+    def _set(self, key: CooldownKey, expiry: int) -> None:
+        if expiry <= now():
+            # Already over; nothing to track
+            self.expiries.pop(key, None)
+            return
+        self.expiries[key] = expiry
+        heapq.heappush(self.heap, (expiry, next(self.counter), key))
+        # Superseded entries are skipped lazily; rebuild if they pile up
+        if len(self.heap) > 2 * len(self.expiries) + 64:
+            self.heap = [entry for entry in self.heap if self.expiries.get(entry[2]) == entry[0]]
+            heapq.heapify(self.heap)
+
+    def _prune(self, current: int) -> None:
+        """Drop expired and superseded entries from the top of the heap"""
+        while self.heap:
+            expiry, _, key = self.heap[0]
+            if expiry > current and self.expiries.get(key) == expiry:
+                break
+            heapq.heappop(self.heap)
+            if self.expiries.get(key) == expiry:
+                # Expired - forget it so memory tracks only active cooldowns
+                del self.expiries[key]
+
+    def _seed(self) -> None:
+        """Load cooldowns that are still running from storage (once)"""
+        if self.seeded:
+            return
+        self.seeded = True
+        current = now()
+        loaded = 0
+        for user_id, action, panda_id, last_used in iter_cooldowns():
+            if action not in self.durations or not last_used:
+                continue
+            key = (user_id, action, panda_id)
+            expiry = last_used + self.durations[action]
+            if expiry > current and key not in self.expiries:
+                self._set(key, expiry)
+                loaded += 1
+        logger.info(f"Loaded {loaded} active cooldowns")
+
+# Shared by the adoption and economy cogs
+cooldowns = CooldownManager()
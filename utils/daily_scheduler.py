@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import itertools
+import os
+import logging
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .clock import now
+from .guild_settings import GuildSettings, parse_daily_time
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep, so a stepped system clock is noticed within this many seconds
+DAILY_SCHEDULER_MAX_SLEEP = float(os.getenv("DAILY_SCHEDULER_MAX_SLEEP", "300"))
+# Seconds after a missed daily time (e.g. downtime) during which it is still delivered late
+DAILY_CATCHUP_GRACE = int(os.getenv("DAILY_CATCHUP_GRACE", "10800"))
+# Seconds before a delivery that its content is fetched and the embed built
+DAILY_PREGEN_LEAD = int(os.getenv("DAILY_PREGEN_LEAD", "300"))
+# Seconds between pre-generation passes (incomplete content is retried on the next pass)
+DAILY_PREGEN_INTERVAL = float(os.getenv("DAILY_PREGEN_INTERVAL", "30"))
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Cached ZoneInfo lookup, raising ValueError for unknown names"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone {name!r}") from e
+
+@lru_cache(maxsize=65536)
+def _occurrence(zone: str, day: int, hour: int, minute: int) -> int:
+    """Epoch time of hour:minute local time on a date ordinal.
+
+    Cached, since every guild sharing a zone and time resolves the same UTC
+    offsets. Times skipped by a DST jump resolve to the same wall-clock
+    offset as before the jump; repeated times use their first occurrence.
+    """
+    local = datetime.combine(date.fromordinal(day), time(hour, minute), tzinfo=get_zone(zone))
+    return int(local.timestamp())
+
+def local_day(settings: GuildSettings, timestamp: int) -> int:
+    """Date ordinal of a timestamp in the guild's timezone"""
+    return datetime.fromtimestamp(timestamp, get_zone(settings.timezone)).toordinal()
+
+def daily_run_on(settings: GuildSettings, day: int) -> int:
+    """Epoch time of the guild's daily_time on a local date ordinal"""
+    hour, minute = parse_daily_time(settings.daily_time)
+    return _occurrence(settings.timezone, day, hour, minute)
+
+def next_daily_run(settings: GuildSettings, after: int) -> int:
+    """Epoch time of the first daily_time (guild's timezone) strictly after `after`"""
+    day = local_day(settings, after)
+    fire_at = daily_run_on(settings, day)
+    while fire_at <= after:
+        day += 1
+        fire_at = daily_run_on(settings, day)
+    return fire_at
+
+def previous_daily_run(settings: GuildSettings, before: int) -> int:
+    """Epoch time of the last daily_time at or before `before`"""
+    day = local_day(settings, before)
+    fire_at = daily_run_on(settings, day)
+    while fire_at > before:
+        day -= 1
+        fire_at = daily_run_on(settings, day)
+    return fire_at
+
+class DailyScheduler:
+    """Fires a delivery callback for every guild at its daily time.
+
+    A single coroutine serves all guilds: next-fire times live in a min-heap
+    and the loop sleeps until the earliest one (or until a schedule changes).
+    schedule() is O(log n); superseded heap entries are skipped when they
+    reach the top, like the cooldown heap.
+    
+    Fire times are absolute wall-clock deadlines, so send latency never
+    accumulates into drift. A fire time in the past fires immediately, which
+    is how missed runs are caught up. Everything due at the same tick is
+    handed to deliver() as one batch. Each (guild, fire time) in a batch stays
+    claimed until that batch finishes, so a slot that is re-scheduled while
+    it is still being delivered is not delivered twice.
+    """
+
+    def __init__(self, deliver: Callable[[List[Tuple[int, int]]], Awaitable[None]],
+                 next_run: Callable[[int, int], Optional[int]]):
+        # [(guild_id, scheduled fire time), ...] -> delivery
+        self.deliver = deliver
+        # guild_id, after -> next fire time (None to stop scheduling the guild)
+        self.next_run = next_run
+        self.next_fire: Dict[int, int] = {}
+        self.heap: List[Tuple[int, int, int]] = []
+        self.counter = itertools.count()
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.deliveries: Set[asyncio.Task] = set()
+        # guild_id -> fire time handed to deliver() whose batch has not finished
+        self.claimed: Dict[int, int] = {}
+        self.fired = 0
+
+    def start(self) -> None:
+        """Start the scheduler coroutine (needs a running event loop)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in [self.task, *self.deliveries]:
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.task = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def schedule(self, guild_id: int, fire_at: Optional[int]) -> None:
+        """Set (or with None, clear) a guild's next fire time"""
+        if fire_at is None:
+            self.next_fire.pop(guild_id, None)
+            return
+        if self.next_fire.get(guild_id) == fire_at:
+            return
+        self.next_fire[guild_id] = fire_at
+        heapq.heappush(self.heap, (fire_at, next(self.counter), guild_id))
+        # Superseded entries are skipped lazily; rebuild if they pile up
+        if len(self.heap) > 2 * len(self.next_fire) + 64:
+            self.heap = [entry for entry in self.heap if self.next_fire.get(entry[2]) == entry[0]]
+            heapq.heapify(self.heap)
+        self.changed.set()
+
+    def next_delivery(self, guild_id: Optional[int] = None) -> Optional[int]:
+        """Next fire time for a guild, or the earliest overall"""
+        if guild_id is not None:
+            return self.next_fire.get(guild_id)
+        self._prune()
+        return self.heap[0][0] if self.heap else None
+
+    def fire_times_within(self, seconds: int) -> List[int]:
+        """Distinct upcoming fire times in the next `seconds`, sorted"""
+        horizon = now() + seconds
+        # Walk the heap as a tree; a node past the horizon has no earlier children
+        times = set()
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            if index >= len(self.heap):
+                continue
+            fire_at, _, guild_id = self.heap[index]
+            if fire_at > horizon:
+                continue
+            if self.next_fire.get(guild_id) == fire_at:
+                times.add(fire_at)
+            stack.extend((2 * index + 1, 2 * index + 2))
+        return sorted(times)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scheduled": len(self.next_fire),
+            "heap_size": len(self.heap),
+            "fired": self.fired,
+            "in_flight": len(self.deliveries),
+            "claimed": len(self.claimed),
+        }
+
+    def _prune(self) -> None:
+        """Drop superseded entries from the top of the heap"""
+        while self.heap and self.next_fire.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    async def _run(self) -> None:
+        while True:
+            self.changed.clear()
+            self._prune()
+            if not self.heap:
+                await self.changed.wait()
+                continue
+
+            delay = self.heap[0][0] - now()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.changed.wait(), timeout=min(delay, DAILY_SCHEDULER_MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._pop_due(now())
+            self.fired += len(batch)
+            task = asyncio.create_task(self._deliver(batch))
+            self.deliveries.add(task)
+            task.add_done_callback(self.deliveries.discard)
+
+    def _pop_due(self, current: int) -> List[Tuple[int, int]]:
+        """Remove every entry due by `current` and schedule each guild's next run"""
+        batch = []
+        while self.heap and self.heap[0][0] <= current:
+            fire_at, _, guild_id = heapq.heappop(self.heap)
+            if self.next_fire.get(guild_id) != fire_at:
+                continue
+            del self.next_fire[guild_id]
+            # Schedule the next run before delivering so a failed send can't drop the guild
+            try:
+                self.schedule(guild_id, self.next_run(guild_id, max(fire_at, current)))
+            except Exception as e:
+                logger.error(f"Failed to reschedule daily panda for guild {guild_id}: {e}")
+            if self.claimed.get(guild_id) == fire_at:
+                # Still being delivered by an earlier batch
+                continue
+            self.claimed[guild_id] = fire_at
+            batch.append((guild_id, fire_at))
+        return batch
+
+    async def _deliver(self, batch: List[Tuple[int, int]]) -> None:
+        try:
+            await self.deliver(batch)
+        except Exception as e:
+            logger.error(f"Daily panda delivery error for {len(batch)} guilds: {e}")
+        finally:
+            for guild_id, fire_at in batch:
+                if self.claimed.get(guild_id) == fire_at:
+                    del self.claimed[guild_id]
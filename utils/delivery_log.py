@@ -0,0 +1,112 @@
+import os
+import logging
+from typing import TextIO, Optional
+from .config import config_data, save_config
+
+logger = logging.getLogger(__name__)
+
+DAILY_DELIVERY_LOG_PATH = os.getenv("DAILY_DELIVERY_LOG_PATH", "daily_deliveries.log")
+# Logged deliveries after which the log is folded into config.json
+DAILY_DELIVERY_LOG_MAX_ENTRIES = int(os.getenv("DAILY_DELIVERY_LOG_MAX_ENTRIES", "10000"))
+
+class DeliveryLog:
+    """Append-only record of delivered daily posts.
+
+    Each delivery appends one "guild_id scheduled_at" line, so recording it
+    costs O(1) instead of re-encoding config.json. compact() saves
+    config.json once (the in-memory settings already hold every logged
+    last_delivery): the log is renamed to <path>.old first, and the
+    persistence thread deletes that file once the config write is on disk.
+    Startup replays both files on top of config.json.
+    """
+
+    def __init__(self, path: str = DAILY_DELIVERY_LOG_PATH):
+        self.path = path
+        self.old_path = f"{path}.old"
+        self.file: Optional[TextIO] = None
+        # Entries appended since the last compaction
+        self.entries = 0
+
+    def record(self, guild_id: int, scheduled_at: int) -> bool:
+        """Append one delivery. Returns False if it could not be written."""
+        try:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(f"{guild_id} {scheduled_at}\n")
+            # Handed to the OS right away, so a crash of the bot can't lose it
+            self.file.flush()
+            self.entries += 1
+            return True
+        except Exception as e:
+            logger.error(f"Failed to log daily delivery for guild {guild_id}: {e}")
+            return False
+
+    def sync(self) -> None:
+        """fsync the log (once per delivery batch, not per send)"""
+        if self.file is None:
+            return
+        try:
+            os.fsync(self.file.fileno())
+        except Exception as e:
+            logger.error(f"Failed to sync {self.path}: {e}")
+
+    def replay(self) -> int:
+        """Apply logged deliveries to the guild settings. Returns the number of settings updated."""
+        guilds = config_data["guilds"]
+        applied = 0
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        guild_id, scheduled_at = map(int, line.split())
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    settings = guilds.get(guild_id)
+                    if settings is not None and scheduled_at > settings.last_delivery:
+                        settings.last_delivery = scheduled_at
+                        applied += 1
+        return applied
+
+    def maybe_compact(self) -> None:
+        """Compact once DAILY_DELIVERY_LOG_MAX_ENTRIES deliveries have been logged"""
+        if self.entries >= DAILY_DELIVERY_LOG_MAX_ENTRIES:
+            self.compact()
+
+    def compact(self) -> bool:
+        """Save config.json once and drop the log entries it now covers. Returns True if queued."""
+        try:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            # An .old file still waiting on an earlier save is covered by this save too
+            if not os.path.exists(self.old_path) and os.path.exists(self.path):
+                os.replace(self.path, self.old_path)
+        except Exception as e:
+            logger.error(f"Failed to rotate {self.path}: {e}")
+            return False
+        self.entries = 0
+        return save_config(config_data, on_done=self._on_saved)
+
+    def _on_saved(self, ok: bool) -> None:
+        # Runs on the persistence thread; a failed save keeps the entries for replay
+        if not ok:
+            return
+        try:
+            if os.path.exists(self.old_path):
+                os.remove(self.old_path)
+        except OSError as e:
+            logger.error(f"Failed to remove {self.old_path}: {e}")
+
+    def close(self) -> None:
+        """Fold the log into config.json (written when the persistence thread drains)"""
+        if self.entries or os.path.exists(self.path) or os.path.exists(self.old_path):
+            self.compact()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Shared by the daily task cog and shutdown
+delivery_log = DeliveryLog()
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import random
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Concurrent senders per delivery run
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "8"))
+# Messages per second across all channels; Discord's global limit is 50/s, the rest is left for commands
+FANOUT_GLOBAL_RATE = float(os.getenv("FANOUT_GLOBAL_RATE", "25"))
+# Per-channel bucket: Discord allows about 5 messages per 5 seconds in one channel
+FANOUT_CHANNEL_BURST = int(os.getenv("FANOUT_CHANNEL_BURST", "5"))
+FANOUT_CHANNEL_RATE = float(os.getenv("FANOUT_CHANNEL_RATE", "1"))
+# Attempts per message (first send included) and base backoff in seconds between them
+FANOUT_MAX_ATTEMPTS = int(os.getenv("FANOUT_MAX_ATTEMPTS", "3"))
+FANOUT_RETRY_DELAY = float(os.getenv("FANOUT_RETRY_DELAY", "2"))
+
+class TokenBucket:
+    """Token bucket rate limiter; acquire() waits for a token"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        current = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (current - self.updated) * self.rate)
+        self.updated = current
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+# (channel_id, payload) - the channel id picks the per-channel bucket
+FanoutJob = Tuple[int, Any]
+
+class FanoutPipeline:
+    """Sends one message to many channels without tripping rate limits.
+
+    Each run is drained by a bounded pool of workers. Every send takes a
+    token from the shared global bucket and from its channel's bucket.
+    send(job) returns True when delivered and False for permanent failures
+    (missing channel, no permission); exceptions are retried with jittered
+    exponential backoff up to FANOUT_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, workers: int = FANOUT_WORKERS, global_rate: float = FANOUT_GLOBAL_RATE):
+        self.workers = workers
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.channel_buckets: Dict[int, TokenBucket] = {}
+
+        # Metrics
+        self.runs = 0
+        self.total_delivered = 0
+        self.total_failed = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def _channel_bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self.channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.channel_buckets[channel_id] = TokenBucket(FANOUT_CHANNEL_RATE, FANOUT_CHANNEL_BURST)
+        return bucket
+
+    async def run(self, jobs: List[FanoutJob], send: Callable[[FanoutJob], Awaitable[bool]]) -> Dict[str, Any]:
+        """Deliver every job and return the run's stats"""
+        started = time.monotonic()
+        stats = {"jobs": len(jobs), "delivered": 0, "failed": 0, "retries": 0}
+        queue: "asyncio.Queue[FanoutJob]" = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        async def worker():
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if await self._send(job, send, stats):
+                    stats["delivered"] += 1
+                else:
+                    stats["failed"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(self.workers, len(jobs))))))
+
+        # Idle buckets are full again and carry no state worth keeping
+        for channel_id in [channel_id for channel_id, bucket in self.channel_buckets.items() if bucket.full]:
+            del self.channel_buckets[channel_id]
+
+        stats["duration"] = time.monotonic() - started
+        self.runs += 1
+        self.total_delivered += stats["delivered"]
+        self.total_failed += stats["failed"]
+        self.last_run = stats
+        logger.info(
+            f"Fan-out run: {stats['delivered']}/{stats['jobs']} delivered, {stats['failed']} failed, "
+            f"{stats['retries']} retries in {stats['duration']:.1f}s"
+        )
+        return stats
+
+    async def _send(self, job: FanoutJob, send: Callable[[FanoutJob], Awaitable[bool]], stats: Dict[str, Any]) -> bool:
+        channel_id = job[0]
+        for attempt in range(1, FANOUT_MAX_ATTEMPTS + 1):
+            await self.global_bucket.acquire()
+            await self._channel_bucket(channel_id).acquire()
+            try:
+                return await send(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == FANOUT_MAX_ATTEMPTS:
+                    logger.error(f"Giving up on channel {channel_id} after {attempt} attempts: {e}")
+                    return False
+                delay = random.uniform(0.5, 1.0) * FANOUT_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"Send to channel {channel_id} failed ({e}), retrying in {delay:.1f}s")
+                stats["retries"] += 1
+                await asyncio.sleep(delay)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "delivered": self.total_delivered,
+            "failed": self.total_failed,
+            "last_run": self.last_run,
+        }
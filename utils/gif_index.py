@@ -0,0 +1,127 @@
+import asyncio
+import os
+import random
+import logging
+from typing import Dict, Any, List, Optional, Set
+from urllib.parse import urlparse
+from . import codec
+from .http_client import HTTPClient
+from .persistence import persistence
+
+logger = logging.getLogger(__name__)
+
+GIF_INDEX_PATH = os.getenv("GIF_INDEX_PATH", "gif_index.json")
+# Max remembered classifications of non-GIF URLs (oldest are forgotten first)
+GIF_INDEX_MAX_SEEN = int(os.getenv("GIF_INDEX_MAX_SEEN", "5000"))
+# Seconds to batch index changes before writing the file
+GIF_INDEX_SAVE_DELAY = float(os.getenv("GIF_INDEX_SAVE_DELAY", "30"))
+
+_STATIC_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+class GifIndex:
+    """Persistent set of panda GIF URLs harvested from every image fetch.
+
+    URLs are classified by extension when it is conclusive and otherwise by
+    a HEAD request for the content type; every answer is cached so each URL
+    is probed at most once, even across restarts.
+    """
+
+    def __init__(self, http: HTTPClient, path: str = GIF_INDEX_PATH):
+        self.http = http
+        self.path = path
+        self.gifs: List[str] = []
+        self.gif_set: Set[str] = set()
+        # url -> is_gif for URLs already classified (insertion ordered for trimming)
+        self.seen: Dict[str, bool] = {}
+        self.probing: Set[str] = set()
+        # Running probe tasks, referenced so they aren't garbage-collected mid-flight
+        self.probe_tasks: Set[asyncio.Task] = set()
+        self.save_handle: Optional[asyncio.TimerHandle] = None
+        self.probes = 0
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = codec.load_file(self.path)
+            for url in data.get("gifs", []):
+                self._add_gif(url)
+            for url in data.get("not_gifs", []):
+                self.seen[url] = False
+            logger.info(f"Loaded GIF index: {len(self.gifs)} GIFs, {len(self.seen)} URLs classified")
+        except Exception as e:
+            logger.error(f"Failed to load {self.path}: {e}. Starting with an empty GIF index.")
+
+    def save(self) -> bool:
+        """Queue the index for writing by the persistence thread"""
+        self.save_handle = None
+        not_gifs = [url for url, is_gif in self.seen.items() if not is_gif]
+        payload = codec.dumps({"gifs": self.gifs, "not_gifs": not_gifs})
+        return persistence.submit(self.path, payload)
+
+    def _schedule_save(self) -> None:
+        if self.save_handle is None:
+            try:
+                self.save_handle = asyncio.get_running_loop().call_later(GIF_INDEX_SAVE_DELAY, self.save)
+            except RuntimeError:
+                self.save()
+
+    async def close(self) -> None:
+        """Cancel running probes and write pending changes now"""
+        tasks = list(self.probe_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+            self.save()
+
+    def _add_gif(self, url: str) -> None:
+        if url not in self.gif_set:
+            self.gif_set.add(url)
+            self.gifs.append(url)
+        self.seen[url] = True
+
+    def _remember(self, url: str, is_gif: bool) -> None:
+        if is_gif:
+            self._add_gif(url)
+        else:
+            self.seen[url] = False
+            while len(self.seen) > GIF_INDEX_MAX_SEEN + len(self.gifs):
+                oldest = next(url for url, known_gif in self.seen.items() if not known_gif)
+                del self.seen[oldest]
+        self._schedule_save()
+
+    def observe(self, url: Optional[str]) -> None:
+        """Classify an image URL seen by any fetch (probing in the background if needed)"""
+        if not url or url in self.seen or url in self.probing:
+            return
+        path = urlparse(url).path.lower()
+        if path.endswith(".gif"):
+            self._remember(url, True)
+        elif path.endswith(_STATIC_EXTENSIONS):
+            self._remember(url, False)
+        else:
+            self.probing.add(url)
+            task = asyncio.ensure_future(self._probe(url))
+            self.probe_tasks.add(task)
+            task.add_done_callback(self.probe_tasks.discard)
+
+    async def _probe(self, url: str) -> None:
+        try:
+            self.probes += 1
+            content_type = await self.http.head_content_type(url)
+            if content_type is not None:
+                self._remember(url, content_type.startswith("image/gif"))
+        except Exception as e:
+            logger.error(f"GIF probe failed for {url}: {e}")
+        finally:
+            self.probing.discard(url)
+
+    def sample(self) -> Optional[str]:
+        """A random known GIF, or None if none have been seen yet"""
+        return random.choice(self.gifs) if self.gifs else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"gifs": len(self.gifs), "classified": len(self.seen), "probes": self.probes}
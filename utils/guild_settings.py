@@ -0,0 +1,46 @@
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def parse_daily_time(value: str) -> Tuple[int, int]:
+    """Parse "HH:MM" into (hour, minute), raising ValueError if invalid"""
+    hour, minute = map(int, value.split(":"))
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"Invalid daily time {value!r}")
+    return hour, minute
+
+class GuildSettings:
+    """Daily panda settings for one guild"""
+
+    __slots__ = ("channel_id", "daily_time", "timezone", "enabled", "last_delivery")
+
+    def __init__(self, daily_time: str = "12:00", timezone: str = "UTC"):
+        self.channel_id: Optional[int] = None
+        self.daily_time = daily_time
+        self.timezone = timezone
+        self.enabled = False
+        # Scheduled time (epoch) of the last daily post that was delivered; 0 = never
+        self.last_delivery = 0
+
+    @property
+    def active(self) -> bool:
+        """True if daily posts should be scheduled"""
+        return self.enabled and self.channel_id is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GuildSettings":
+        settings = cls()
+        for field, value in data.items():
+            try:
+                setattr(settings, field, value)
+            except AttributeError:
+                logger.warning(f"Ignoring unknown guild setting {field!r}")
+        return settings
+
+def load_guild_settings(guilds: Dict[str, Any]) -> Dict[int, GuildSettings]:
+    """Build the in-memory guild settings index from config.json"""
+    return {int(guild_id): GuildSettings.from_dict(data) for guild_id, data in guilds.items()}
@@ -1,35 +1,367 @@
+import asyncio
+import copy
+import os
+import random
+import time
 import aiohttp
 import logging
-from typing import Optional, Dict, Any
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from . import codec
 
 logger = logging.getLogger(__name__)
 
+# Connection pool tuning (shared by every cog through PandaBot.http_client)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "12"))
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+# Seconds a finished GET keeps answering identical requests (single-flight window)
+HTTP_COALESCE_WINDOW = float(os.getenv("HTTP_COALESCE_WINDOW", "0.5"))
+
+# Circuit breaker: consecutive failures that open it, and seconds before a trial request
+HTTP_BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+# Adaptive timeout = recent p95 latency x multiplier, clamped to [HTTP_MIN_TIMEOUT, HTTP_TIMEOUT]
+HTTP_MIN_TIMEOUT = float(os.getenv("HTTP_MIN_TIMEOUT", "2"))
+HTTP_TIMEOUT_MULTIPLIER = float(os.getenv("HTTP_TIMEOUT_MULTIPLIER", "3"))
+HTTP_LATENCY_SAMPLES = 50
+
+# Seconds a call (including retries) may take, so replies stay well inside the interaction window
+HTTP_REQUEST_DEADLINE = float(os.getenv("HTTP_REQUEST_DEADLINE", "12"))
+# Retry budget per host: each request earns this many retry tokens, a retry spends one
+HTTP_RETRY_BUDGET_RATIO = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.2"))
+HTTP_RETRY_BUDGET_MAX = float(os.getenv("HTTP_RETRY_BUDGET_MAX", "10"))
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter for one endpoint"""
+
+    __slots__ = ("max_attempts", "base_delay", "max_delay")
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class HostHealth:
+    """Circuit breaker and latency window for one upstream host.
+
+    closed: requests flow, consecutive failures are counted.
+    open: requests fail immediately until HTTP_BREAKER_COOLDOWN has passed.
+    half_open: one trial request is let through; success closes, failure re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.latencies: Deque[float] = deque(maxlen=HTTP_LATENCY_SAMPLES)
+        self.short_circuited = 0
+        self.times_opened = 0
+        self.retry_tokens = HTTP_RETRY_BUDGET_MAX
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= HTTP_BREAKER_COOLDOWN:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.host} closed")
+        self.state = self.CLOSED
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= HTTP_BREAKER_THRESHOLD:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit for {self.host} opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def earn_retry_token(self) -> None:
+        self.retry_tokens = min(HTTP_RETRY_BUDGET_MAX, self.retry_tokens + HTTP_RETRY_BUDGET_RATIO)
+
+    def spend_retry_token(self) -> bool:
+        """Take a token from the retry budget; False when retries would amplify an outage"""
+        if self.retry_tokens < 1:
+            return False
+        self.retry_tokens -= 1
+        return True
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (seconds) over the recent window, None without enough samples"""
+        if len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        """Request timeout adapted to recent latency"""
+        p95 = self.percentile(0.95)
+        if p95 is None:
+            return HTTP_TIMEOUT
+        return max(HTTP_MIN_TIMEOUT, min(HTTP_TIMEOUT, p95 * HTTP_TIMEOUT_MULTIPLIER))
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.percentile(0.95)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+            "timeout": self.timeout(),
+            "retry_tokens": self.retry_tokens,
+        }
+
 class HTTPClient:
-    """Async HTTP client for API requests"""
-    
+    """Async HTTP client for API requests.
+
+    One instance is owned by the bot and shared by all cogs, so requests to
+    the same host reuse pooled keep-alive connections.
+    """
+
     def __init__(self):
         self.session: Optional[aiohttp.ClientSession] = None
-    
+        # url -> shared request future for single-flight GETs
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.waiters: Dict[asyncio.Future, int] = {}
+        self.coalesced = 0
+        self.hosts: Dict[str, HostHealth] = {}
+        # host -> retry policy (DEFAULT_RETRY_POLICY otherwise)
+        self.retry_policies: Dict[str, RetryPolicy] = {}
+        self.retries = 0
+        self.retries_skipped = 0
+
+        # Pool metrics, fed by aiohttp trace hooks
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
     async def ensure_session(self):
         """Ensure HTTP session is created"""
-        if not self.session:
-            timeout = aiohttp.ClientTimeout(total=12)
-            self.session = aiohttp.ClientSession(timeout=timeout)
-    
+        if not self.session or self.session.closed:
+            timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE,
+                ttl_dns_cache=HTTP_DNS_TTL
+            )
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(self._on_request_start)
+            trace.on_connection_create_end.append(self._on_connection_create_end)
+            trace.on_connection_reuseconn.append(self._on_connection_reuseconn)
+            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector, trace_configs=[trace])
+
     async def close(self):
         """Close HTTP session"""
         if self.session:
             await self.session.close()
             self.session = None
-    
-    async def get_json(self, url: str) -> Optional[Dict[str, Any]]:
-        """Make GET request and return JSON response"""
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.connections_reused += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool statistics"""
+        idle = in_use = 0
+        if self.session and not self.session.closed:
+            connector = self.session.connector
+            # aiohttp keeps idle keep-alive connections per host in _conns
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            in_use = len(getattr(connector, "_acquired", ()))
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "open": idle + in_use,
+            "idle": idle,
+            "in_use": in_use,
+            "created": self.connections_created,
+            "reused": self.connections_reused,
+            "reuse_ratio": self.connections_reused / acquired if acquired else 0.0,
+            "limit_per_host": HTTP_LIMIT_PER_HOST,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "retries_skipped": self.retries_skipped,
+        }
+
+    def set_retry_policy(self, url: str, policy: RetryPolicy) -> None:
+        """Use a specific retry policy for the URL's host"""
+        self.retry_policies[urlparse(url).netloc] = policy
+
+    async def get_json(self, url: str, coalesce: bool = True, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Make GET request and return JSON response.
+        
+        Concurrent calls for the same URL (and calls within HTTP_COALESCE_WINDOW
+        of it finishing) share one upstream request; each caller gets its own
+        copy of the parsed body. Pass coalesce=False when every call needs a
+        fresh response, e.g. when filling a buffer.
+        
+        Transient failures are retried per the host's RetryPolicy, but never
+        past `deadline` (time.monotonic() value, default HTTP_REQUEST_DEADLINE from now).
+        """
+        if deadline is None:
+            deadline = time.monotonic() + HTTP_REQUEST_DEADLINE
+        if not coalesce:
+            return await self._request("GET", url, deadline, _read_json)
+
+        future = self.inflight.get(url)
+        if future is not None and not future.cancelled():
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(self._request("GET", url, deadline, _read_json))
+            self.inflight[url] = future
+            future.add_done_callback(lambda _: self._expire_inflight(url, future))
+        return await self._await_shared(future)
+
+    async def _await_shared(self, future: asyncio.Future) -> Optional[Dict[str, Any]]:
+        """Wait on a shared request; it is only aborted once every waiter has given up"""
+        self.waiters[future] = self.waiters.get(future, 0) + 1
+        try:
+            # shield: a caller giving up must not cancel the request for the others
+            result = await asyncio.shield(future)
+            # Private copy, so one caller mutating the body can't change what the others see
+            return copy.deepcopy(result)
+        finally:
+            self.waiters[future] -= 1
+            if not self.waiters[future]:
+                del self.waiters[future]
+                if not future.done():
+                    future.cancel()
+
+    def _expire_inflight(self, url: str, future: asyncio.Future) -> None:
+        def forget():
+            if self.inflight.get(url) is future:
+                del self.inflight[url]
+        if HTTP_COALESCE_WINDOW > 0 and not future.cancelled():
+            asyncio.get_running_loop().call_later(HTTP_COALESCE_WINDOW, forget)
+        else:
+            forget()
+
+    def host_health(self, url: str) -> HostHealth:
+        """Breaker and latency tracking for the URL's host"""
+        host = urlparse(url).netloc
+        health = self.hosts.get(host)
+        if health is None:
+            health = self.hosts[host] = HostHealth(host)
+        return health
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: health.stats() for host, health in self.hosts.items()}
+
+    async def _request(self, method: str, url: str, deadline: float, read: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Send a request through the host's breaker, adaptive timeout and retry policy.
+
+        `read(resp)` turns a 200 response into the result; anything else gives None.
+        """
+        health = self.host_health(url)
+        policy = self.retry_policies.get(health.host, DEFAULT_RETRY_POLICY)
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not health.allow():
+                # Out of time or breaker open: let the caller use its local fallback right away
+                return None
+
+            health.earn_retry_token()
+            data, retryable, retry_after = await self._attempt(method, url, health, min(health.timeout(), remaining), read)
+            if not retryable or attempt >= policy.max_attempts:
+                return data
+
+            delay = policy.backoff(attempt)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            # Only retry if there is time left for a reasonable attempt after waiting
+            if time.monotonic() + delay + HTTP_MIN_TIMEOUT > deadline or not health.spend_retry_token():
+                self.retries_skipped += 1
+                return None
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, method: str, url: str, health: HostHealth, timeout: float,
+                       read: Callable[[Any], Awaitable[Any]]) -> Tuple[Any, bool, Optional[float]]:
+        """One request. Returns (data, retryable, retry_after seconds)."""
         await self.ensure_session()
+        started = time.monotonic()
         try:
-            async with self.session.get(url) as resp:
+            async with self.session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
                 if resp.status == 200:
-                    return await resp.json()
-                logger.warning(f"HTTP {resp.status} for {url}")
+                    data = await read(resp)
+                    health.record_success(time.monotonic() - started)
+                    return data, False, None
+                logger.warning(f"HTTP {resp.status} for {method} {url}")
+                if resp.status >= 500 or resp.status == 429:
+                    health.record_failure()
+                    return None, True, parse_retry_after(resp.headers.get("Retry-After"))
+                health.record_success(time.monotonic() - started)
+                return None, False, None
+        except asyncio.CancelledError:
+            health.trial_in_flight = False
+            raise
         except Exception as e:
-            logger.error(f"HTTP error for {url}: {e}")
-        return None
\ No newline at end of file
+            logger.error(f"HTTP error for {method} {url}: {e}")
+            health.record_failure()
+            return None, True, None
+
+    async def head_content_type(self, url: str, deadline: Optional[float] = None) -> Optional[str]:
+        """HEAD a URL and return its Content-Type (None on failure or while its host's breaker is open)"""
+        if deadline is None:
+            deadline = time.monotonic() + HTTP_REQUEST_DEADLINE
+        return await self._request("HEAD", url, deadline, _read_content_type)
+
+async def _read_json(resp) -> Any:
+    # Decode the raw body ourselves so the fast codec is used
+    return codec.loads(await resp.read())
+
+async def _read_content_type(resp) -> str:
+    return resp.headers.get("Content-Type", "").lower()
@@ -0,0 +1,241 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+from .fanout import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, highest first
+INTERACTIVE = 0   # replies to a user who is waiting (followups, trivia answers, poll reactions)
+ADMIN = 1         # sends triggered by admin commands (/say, /pandatest)
+BACKGROUND = 2    # bot-initiated traffic (daily posts, welcome messages)
+LANE_NAMES = ("interactive", "admin", "background")
+
+# Concurrent REST calls, and how many of them background work may occupy
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "8"))
+OUTBOUND_BACKGROUND_WORKERS = int(os.getenv("OUTBOUND_BACKGROUND_WORKERS", "5"))
+# Requests per second across all lanes (Discord's global limit is 50/s)
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "45"))
+# Queued background requests beyond which optional background work is dropped
+OUTBOUND_SHED_THRESHOLD = int(os.getenv("OUTBOUND_SHED_THRESHOLD", "200"))
+
+class OutboundShed(Exception):
+    """Optional background work dropped because the queue is under pressure"""
+
+class OutboundClosed(Exception):
+    """The queue shut down before the request was sent"""
+
+class _Request:
+    __slots__ = ("lane", "key", "factory", "future", "queued_at")
+
+    def __init__(self, lane: int, key: Hashable, factory: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.lane = lane
+        self.key = key
+        self.factory = factory
+        self.future = future
+        self.queued_at = time.monotonic()
+
+class OutboundQueue:
+    """Central sender for Discord REST calls.
+
+    Requests are keyed by channel and kept in order per channel (one in
+    flight per channel). Idle channels wait in a heap ordered by the best
+    lane among their queued requests, so interactive work always goes
+    first. Background work may use only OUTBOUND_BACKGROUND_WORKERS
+    workers, leaving the rest free for user-facing replies, and optional
+    background requests are shed once too many are queued.
+    """
+
+    def __init__(self, workers: int = OUTBOUND_WORKERS, global_rate: float = OUTBOUND_GLOBAL_RATE):
+        self.worker_count = workers
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.channels: Dict[Hashable, Deque[_Request]] = {}
+        self.busy: Set[Hashable] = set()
+        # (lane, seq, key) for channels with queued work; stale entries are skipped
+        self.ready: List[Tuple[int, int, Hashable]] = []
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.workers: List[asyncio.Task] = []
+        self.background_running = 0
+        self.closing = False
+
+        # Metrics
+        self.queued = [0, 0, 0]
+        self.sent = [0, 0, 0]
+        self.failed = [0, 0, 0]
+        self.total_wait = [0.0, 0.0, 0.0]
+        self.max_wait = [0.0, 0.0, 0.0]
+        self.shed = 0
+
+    def start(self) -> None:
+        """Start the workers (idempotent, needs a running event loop)"""
+        self.workers = [task for task in self.workers if not task.done()]
+        while len(self.workers) < self.worker_count:
+            self.workers.append(asyncio.create_task(self._worker()))
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting requests, let queued ones finish for up to `timeout` seconds, then stop.
+
+        Requests still queued or running after that fail with OutboundClosed.
+        """
+        self.closing = True
+        deadline = time.monotonic() + timeout
+        while (self.channels or self.busy) and self.workers and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self.workers:
+            task.cancel()
+        for task in self.workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.workers = []
+
+        dropped = 0
+        for pending in self.channels.values():
+            for request in pending:
+                self.queued[request.lane] -= 1
+                if not request.future.done():
+                    request.future.set_exception(OutboundClosed("Outbound queue closed"))
+                    dropped += 1
+        self.channels.clear()
+        self.ready.clear()
+        if dropped:
+            logger.warning(f"Outbound queue closed with {dropped} unsent requests")
+
+    async def submit(self, lane: int, key: Hashable, factory: Callable[[], Awaitable[Any]], shed: bool = False) -> Any:
+        """Run factory() through the queue and return its result (or raise its error).
+
+        With shed=True the request is optional and raises OutboundShed instead
+        of queueing when the background backlog is over OUTBOUND_SHED_THRESHOLD.
+        """
+        if self.closing:
+            raise OutboundClosed(f"Outbound queue closed, rejected {LANE_NAMES[lane]} request")
+        if shed and self.queued[BACKGROUND] >= OUTBOUND_SHED_THRESHOLD:
+            self.shed += 1
+            raise OutboundShed(f"Outbound queue under pressure, dropped {LANE_NAMES[lane]} request")
+
+        self.start()
+        request = _Request(lane, key, factory, asyncio.get_running_loop().create_future())
+        self.channels.setdefault(key, deque()).append(request)
+        self.queued[lane] += 1
+        self._mark_ready(key, lane)
+        return await request.future
+
+    def _mark_ready(self, key: Hashable, lane: int) -> None:
+        if key not in self.busy:
+            heapq.heappush(self.ready, (lane, next(self.counter), key))
+            self.wakeup.set()
+
+    def _take(self) -> Optional[_Request]:
+        """Next request to run, or None if nothing may run now"""
+        # Channels whose next request is background while the background cap is reached
+        deferred = []
+        try:
+            while self.ready:
+                lane, _, key = self.ready[0]
+                pending = self.channels.get(key)
+                if key in self.busy or not pending:
+                    heapq.heappop(self.ready)
+                    continue
+                # The cap applies to the request that runs, not to the channel's best lane
+                if pending[0].lane == BACKGROUND and self.background_running >= OUTBOUND_BACKGROUND_WORKERS:
+                    if lane == BACKGROUND:
+                        # Everything left is background; keep the remaining workers for replies
+                        return None
+                    deferred.append(heapq.heappop(self.ready))
+                    continue
+                heapq.heappop(self.ready)
+                request = pending.popleft()
+                if not pending:
+                    del self.channels[key]
+                self.busy.add(key)
+                self.queued[request.lane] -= 1
+                return request
+            return None
+        finally:
+            for entry in deferred:
+                heapq.heappush(self.ready, entry)
+
+    async def _worker(self) -> None:
+        while True:
+            self.wakeup.clear()
+            request = self._take()
+            if request is None:
+                await self.wakeup.wait()
+                continue
+            # Other workers may be able to take more
+            self.wakeup.set()
+
+            background = request.lane == BACKGROUND
+            if background:
+                self.background_running += 1
+            try:
+                if request.future.done():
+                    # Caller gave up (e.g. the command was cancelled)
+                    continue
+                waited = time.monotonic() - request.queued_at
+                self.total_wait[request.lane] += waited
+                self.max_wait[request.lane] = max(self.max_wait[request.lane], waited)
+                await self.global_bucket.acquire()
+                try:
+                    result = await request.factory()
+                except Exception as e:
+                    self.failed[request.lane] += 1
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                else:
+                    self.sent[request.lane] += 1
+                    if not request.future.done():
+                        request.future.set_result(result)
+            except asyncio.CancelledError:
+                # Closing: don't leave the caller waiting forever
+                if not request.future.done():
+                    request.future.set_exception(OutboundClosed("Outbound queue closed while sending"))
+                raise
+            finally:
+                if background:
+                    self.background_running -= 1
+                self.busy.discard(request.key)
+                pending = self.channels.get(request.key)
+                if pending:
+                    self._mark_ready(request.key, min(queued.lane for queued in pending))
+                else:
+                    self.wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        lanes = {}
+        for lane, name in enumerate(LANE_NAMES):
+            done = self.sent[lane] + self.failed[lane]
+            lanes[name] = {
+                "queued": self.queued[lane],
+                "sent": self.sent[lane],
+                "failed": self.failed[lane],
+                "avg_wait_ms": self.total_wait[lane] / done * 1000 if done else 0.0,
+                "max_wait_ms": self.max_wait[lane] * 1000,
+            }
+        return {"lanes": lanes, "shed": self.shed, "busy_channels": len(self.busy)}
+
+# Shared by every cog
+outbound = OutboundQueue()
+
+async def followup(interaction, *args, **kwargs):
+    """interaction.followup.send through the interactive lane"""
+    return await outbound.submit(INTERACTIVE, interaction.channel_id, lambda: interaction.followup.send(*args, **kwargs))
+
+async def send_message(channel, *args, lane: int = BACKGROUND, shed: bool = False, **kwargs):
+    """channel.send through the queue"""
+    return await outbound.submit(lane, channel.id, lambda: channel.send(*args, **kwargs), shed=shed)
+
+async def reply(message, *args, lane: int = INTERACTIVE, **kwargs):
+    """message.reply through the queue"""
+    return await outbound.submit(lane, message.channel.id, lambda: message.reply(*args, **kwargs))
+
+async def add_reaction(message, emoji, lane: int = INTERACTIVE):
+    """message.add_reaction through the queue"""
+    return await outbound.submit(lane, message.channel.id, lambda: message.add_reaction(emoji))
@@ -1,67 +1,315 @@
+import asyncio
+import os
 import random
+import time
 import logging
-from typing import Optional, Tuple
-from .http_client import HTTPClient
-from .constants import SRA_PANDA, SRA_RED_PANDA, QUOTES_API, JOKE_API, PANDA_FACTS, PANDA_JOKES
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from .http_client import HTTPClient, RetryPolicy
+from .gif_index import GifIndex
+from .content_cache import ContentCache
+from .constants import SRA_PANDA, SRA_RED_PANDA, QUOTES_API, JOKE_API, PANDA_FACTS, PANDA_JOKES, PANDA_QUOTES
 
 logger = logging.getLogger(__name__)
 
+# (image, fact) pairs kept ready in memory by the prefetch task
+PANDA_PREFETCH_DEPTH = int(os.getenv("PANDA_PREFETCH_DEPTH", "8"))
+# Seconds before a prefetched pair is considered stale and dropped
+PANDA_PREFETCH_MAX_AGE = float(os.getenv("PANDA_PREFETCH_MAX_AGE", "900"))
+
+# Hedged SRA fetches: fire the red panda endpoint if the panda one is slower than its p90
+SRA_HEDGE = os.getenv("SRA_HEDGE", "1") != "0"
+SRA_HEDGE_PERCENTILE = float(os.getenv("SRA_HEDGE_PERCENTILE", "0.9"))
+# Hedge delay (seconds) until enough latency samples exist, and its lower bound
+SRA_HEDGE_DELAY = float(os.getenv("SRA_HEDGE_DELAY", "1.5"))
+SRA_HEDGE_MIN_DELAY = float(os.getenv("SRA_HEDGE_MIN_DELAY", "0.1"))
+
+# Top the content cache up in the background while fewer unserved items than this remain
+CONTENT_CACHE_LOW_WATER = int(os.getenv("CONTENT_CACHE_LOW_WATER", "10"))
+# Seconds between background top-up fetches, to stay polite to the upstream APIs
+CONTENT_CACHE_TOPUP_INTERVAL = float(os.getenv("CONTENT_CACHE_TOPUP_INTERVAL", "2"))
+# Consecutive already-cached results before a kind is considered exhausted for this round
+_TOPUP_MAX_DUPLICATES = 3
+
 class PandaAPI:
-    """Helper class for panda-related API calls"""
+    """Helper class for panda-related API calls.
+    
+    Images are served from a prefetch buffer that a background task keeps
+    topped up, so commands don't wait on the upstream API. When the buffer is
+    empty the call falls back to a live fetch.
     
-    def __init__(self):
-        self.http = HTTPClient()
+    Quotes, jokes and facts are served from a disk-backed ContentCache that a
+    second task tops up; live fetches only happen while the cache is cold.
+    """
+    
+    def __init__(self, http: Optional[HTTPClient] = None):
+        # Cogs pass the bot's shared client; a private one is only created as a fallback
+        self.owns_http = http is None
+        self.http = http or HTTPClient()
+        # Quotes and jokes have no second endpoint, so they retry more; SRA is hedged instead
+        self.http.set_retry_policy(QUOTES_API, RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0))
+        self.http.set_retry_policy(JOKE_API, RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0))
+        self.http.set_retry_policy(SRA_PANDA, RetryPolicy(max_attempts=2, base_delay=0.25, max_delay=1.0))
+        self.gif_index = GifIndex(self.http)
+        self.cache = ContentCache()
+        
+        self.prefetched: Deque[Tuple[float, Optional[str], Optional[str]]] = deque()
+        # Images from pairs whose fact was used on its own
+        self.spare_images: Deque[str] = deque(maxlen=PANDA_PREFETCH_DEPTH)
+        self.refill_needed = asyncio.Event()
+        self.prefetch_task: Optional[asyncio.Task] = None
+        self.topup_needed = asyncio.Event()
+        self.topup_task: Optional[asyncio.Task] = None
+        
+        # Prefetch metrics
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+        self.prefetch_failures = 0
+        
+        # Hedging metrics
+        self.sra_fetches = 0
+        self.hedges = 0
+        self.hedge_wins = {"primary": 0, "fallback": 0}
+    
+    def start_prefetch(self) -> None:
+        """Start the background refill task (needs a running event loop)"""
+        if PANDA_PREFETCH_DEPTH > 0 and (self.prefetch_task is None or self.prefetch_task.done()):
+            self.refill_needed.set()
+            self.prefetch_task = asyncio.create_task(self._prefetch_loop())
+        if CONTENT_CACHE_LOW_WATER > 0 and (self.topup_task is None or self.topup_task.done()):
+            self.topup_needed.set()
+            self.topup_task = asyncio.create_task(self._topup_loop())
     
     async def close(self):
-        """Close HTTP client"""
-        await self.http.close()
-    
-    async def _fetch_sra_animal(self, primary: str, fallback: str) -> Tuple[Optional[str], Optional[str]]:
-        """Fetch data from Some Random API with fallback"""
-        for url in (primary, fallback):
-            data = await self.http.get_json(url)
-            if isinstance(data, dict):
-                img = data.get("image")
-                fact = data.get("fact")
+        """Stop background tasks and close HTTP client (only if this instance created it)"""
+        for task in (self.prefetch_task, self.topup_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.prefetch_task = self.topup_task = None
+        await self.gif_index.close()
+        self.cache.close()
+        if self.owns_http:
+            await self.http.close()
+    
+    async def _prefetch_loop(self) -> None:
+        """Keep the buffer at PANDA_PREFETCH_DEPTH pairs"""
+        backoff = 1.0
+        while True:
+            await self.refill_needed.wait()
+            self.refill_needed.clear()
+            while len(self.prefetched) < PANDA_PREFETCH_DEPTH:
+                try:
+                    # Buffered pairs must be distinct, so skip single-flight sharing
+                    img, fact = await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA, coalesce=False)
+                except Exception as e:
+                    logger.error(f"Panda prefetch error: {e}")
+                    img = fact = None
+                if not img and not fact:
+                    # Upstream is failing - back off instead of hammering it
+                    self.prefetch_failures += 1
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 60.0)
+                    continue
+                backoff = 1.0
+                self.prefetched.append((time.monotonic(), img, fact))
+    
+    async def _topup_loop(self) -> None:
+        """Keep at least CONTENT_CACHE_LOW_WATER unserved quotes, jokes and facts cached"""
+        sources = {"quotes": self._fetch_quote_live, "jokes": self._fetch_joke_live, "facts": self._fetch_fact_live}
+        while True:
+            await self.topup_needed.wait()
+            self.topup_needed.clear()
+            for kind, fetch in sources.items():
+                duplicates = 0
+                while self.cache.unserved(kind) < CONTENT_CACHE_LOW_WATER and duplicates < _TOPUP_MAX_DUPLICATES:
+                    try:
+                        value = await fetch(False)
+                    except Exception as e:
+                        logger.error(f"Content cache top-up error ({kind}): {e}")
+                        value = None
+                    if value is None:
+                        # Upstream failing - try again on the next request for this kind
+                        break
+                    if self.cache.add(kind, value):
+                        duplicates = 0
+                    else:
+                        duplicates += 1
+                    await asyncio.sleep(CONTENT_CACHE_TOPUP_INTERVAL)
+    
+    def _take_cached(self, kind: str) -> Optional[Any]:
+        value = self.cache.take(kind)
+        if self.topup_task is not None and self.cache.unserved(kind) < CONTENT_CACHE_LOW_WATER:
+            self.topup_needed.set()
+        return value
+    
+    async def fetch_panda_pair(self) -> Tuple[Optional[str], Optional[str]]:
+        """Get an (image, fact) pair, from the prefetch buffer when possible"""
+        cutoff = time.monotonic() - PANDA_PREFETCH_MAX_AGE
+        while self.prefetched:
+            fetched_at, img, fact = self.prefetched.popleft()
+            if self.prefetch_task is not None:
+                self.refill_needed.set()
+            if fetched_at >= cutoff:
+                self.prefetch_hits += 1
+                return img, fact
+        self.prefetch_misses += 1
+        if self.prefetch_task is not None:
+            self.refill_needed.set()
+        return await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA)
+    
+    def prefetch_stats(self) -> Dict[str, Any]:
+        served = self.prefetch_hits + self.prefetch_misses
+        return {
+            "depth": len(self.prefetched),
+            "target": PANDA_PREFETCH_DEPTH,
+            "hits": self.prefetch_hits,
+            "misses": self.prefetch_misses,
+            "failures": self.prefetch_failures,
+            "hit_rate": self.prefetch_hits / served if served else 0.0,
+        }
+    
+    async def _fetch_sra_once(self, url: str, coalesce: bool) -> Tuple[Optional[str], Optional[str]]:
+        data = await self.http.get_json(url, coalesce=coalesce)
+        if isinstance(data, dict):
+            img = data.get("image")
+            self.gif_index.observe(img)
+            return img, data.get("fact")
+        return None, None
+    
+    def hedge_delay(self, url: str) -> float:
+        """Seconds to wait for the primary before hedging (its recent p90 latency)"""
+        latency = self.http.host_health(url).percentile(SRA_HEDGE_PERCENTILE)
+        return max(SRA_HEDGE_MIN_DELAY, latency if latency is not None else SRA_HEDGE_DELAY)
+    
+    async def _fetch_sra_animal(self, primary: str, fallback: str, coalesce: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Fetch data from Some Random API with fallback.
+        
+        If the primary is slower than usual the fallback is fired concurrently
+        (a hedge); the first useful answer wins and the other request is cancelled.
+        """
+        self.sra_fetches += 1
+        if not SRA_HEDGE:
+            for url in (primary, fallback):
+                img, fact = await self._fetch_sra_once(url, coalesce)
                 if img or fact:
                     return img, fact
-        return None, None
+            return None, None
+        
+        primary_task = asyncio.ensure_future(self._fetch_sra_once(primary, coalesce))
+        pending = {primary_task}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay(primary))
+            if done:
+                img, fact = primary_task.result()
+                if img or fact:
+                    return img, fact
+                # Primary failed outright - plain fallback, not a hedge
+                return await self._fetch_sra_once(fallback, coalesce)
+            
+            self.hedges += 1
+            fallback_task = asyncio.ensure_future(self._fetch_sra_once(fallback, coalesce))
+            legs = {primary_task: "primary", fallback_task: "fallback"}
+            pending = set(legs)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    img, fact = task.result()
+                    if img or fact:
+                        self.hedge_wins[legs[task]] += 1
+                        return img, fact
+            return None, None
+        finally:
+            # Also runs when the caller is cancelled (e.g. close() stopping the prefetcher)
+            for task in pending:
+                task.cancel()
+    
+    def hedge_stats(self) -> Dict[str, Any]:
+        return {
+            "fetches": self.sra_fetches,
+            "hedges": self.hedges,
+            "hedge_rate": self.hedges / self.sra_fetches if self.sra_fetches else 0.0,
+            "primary_wins": self.hedge_wins["primary"],
+            "fallback_wins": self.hedge_wins["fallback"],
+        }
     
     async def fetch_panda_image(self) -> Optional[str]:
         """Fetch a panda image URL"""
-        img, _ = await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA)
+        if self.spare_images:
+            return self.spare_images.popleft()
+        img, fact = await self.fetch_panda_pair()
+        if fact:
+            # Not shown with the image, so keep it for a later /pandafact
+            self.cache.add("facts", fact)
         return img
     
     async def fetch_panda_gif(self) -> Optional[str]:
-        """Fetch a panda GIF URL (if available)"""
-        img, _ = await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA)
-        if img and img.lower().endswith(".gif"):
-            return img
-        return None
+        """Get a panda GIF URL from the harvested GIF index (None until one has been seen)"""
+        return self.gif_index.sample()
+    
+    async def _fetch_fact_live(self, coalesce: bool = True) -> Optional[str]:
+        img, fact = await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA, coalesce=coalesce)
+        if img:
+            self.spare_images.append(img)
+        return fact
     
     async def fetch_panda_fact(self) -> str:
-        """Fetch a panda fact (API or fallback)"""
-        _, fact = await self._fetch_sra_animal(SRA_PANDA, SRA_RED_PANDA)
+        """Fetch a panda fact (cache, API or fallback)"""
+        fact = self._take_cached("facts")
         if fact:
             return fact
+        img, fact = await self.fetch_panda_pair()
+        if img:
+            self.spare_images.append(img)
+        if fact:
+            self.cache.add("facts", fact, served=True)
+            return fact
         return random.choice(PANDA_FACTS)
     
-    async def fetch_quote(self) -> Optional[Tuple[str, str]]:
-        """Fetch an inspirational quote"""
-        data = await self.http.get_json(QUOTES_API)
+    async def fetch_panda_bundle(self) -> Tuple[Optional[str], str]:
+        """Fetch an image and a fact from one response (API or fallback fact)"""
+        img, fact = await self.fetch_panda_pair()
+        if fact:
+            self.cache.add("facts", fact, served=True)
+        return img, fact or random.choice(PANDA_FACTS)
+    
+    async def _fetch_quote_live(self, coalesce: bool = True) -> Optional[List[str]]:
+        data = await self.http.get_json(QUOTES_API, coalesce=coalesce)
         try:
             if isinstance(data, list) and data:
                 q = data[0]
-                return q.get("content"), q.get("author", "Unknown")
+                if q.get("content"):
+                    return [q["content"], q.get("author", "Unknown")]
         except Exception as e:
             logger.error(f"Quote parse error: {e}")
         return None
     
-    async def fetch_joke(self) -> Optional[str]:
-        """Fetch a random joke (API or fallback)"""
-        data = await self.http.get_json(JOKE_API)
+    async def fetch_quote(self) -> Tuple[str, str]:
+        """Fetch an inspirational quote (cache, API or fallback)"""
+        quote = self._take_cached("quotes")
+        if quote is None:
+            quote = await self._fetch_quote_live()
+            if quote is None:
+                return random.choice(PANDA_QUOTES)
+            self.cache.add("quotes", quote, served=True)
+        content, author = quote
+        return content, author
+    
+    async def _fetch_joke_live(self, coalesce: bool = True) -> Optional[str]:
+        data = await self.http.get_json(JOKE_API, coalesce=coalesce)
         if isinstance(data, dict):
-            j = data.get("joke")
-            if j:
-                return j
-        return random.choice(PANDA_JOKES)
\ No newline at end of file
+            return data.get("joke") or None
+        return None
+    
+    async def fetch_joke(self) -> str:
+        """Fetch a random joke (cache, API or fallback)"""
+        joke = self._take_cached("jokes")
+        if joke is None:
+            joke = await self._fetch_joke_live()
+            if joke is None:
+                return random.choice(PANDA_JOKES)
+            self.cache.add("jokes", joke, served=True)
+        return joke
\ No newline at end of file
@@ -0,0 +1,198 @@
+import atexit
+import os
+import queue
+import tempfile
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Max snapshots waiting to be written before submitters block
+PERSIST_QUEUE_SIZE = int(os.getenv("PERSIST_QUEUE_SIZE", "32"))
+# "always" fsyncs every file before it replaces the old one, "never" leaves it to the OS
+PERSIST_FSYNC = os.getenv("PERSIST_FSYNC", "always").lower()
+
+class _WriteRequest:
+    """A serialized snapshot waiting to be written"""
+
+    __slots__ = ("path", "payload", "queued_at", "waiters", "callbacks", "ok")
+
+    def __init__(self, path: str, payload: bytes):
+        self.path = path
+        self.payload = payload
+        self.queued_at = time.monotonic()
+        # Events of wait=True callers, set once this request is written
+        self.waiters: List[threading.Event] = []
+        # Called on the writer thread with the write's outcome
+        self.callbacks: List[Callable[[bool], None]] = []
+        self.ok = False
+
+class PersistenceWorker:
+    """Single background thread that writes JSON snapshots atomically.
+
+    Callers serialize on the event loop (so the snapshot is consistent) and
+    hand the bytes over; the blocking open/write/fsync/replace happens here.
+    This thread is the only writer. A snapshot submitted while an older one
+    for the same file is still queued replaces it, so writes for one file
+    never reorder and the newest snapshot always lands last.
+    """
+
+    def __init__(self, max_queue: int = PERSIST_QUEUE_SIZE, fsync_policy: str = PERSIST_FSYNC):
+        self.queue: "queue.Queue[Optional[_WriteRequest]]" = queue.Queue(maxsize=max_queue)
+        self.fsync = fsync_policy != "never"
+        self.thread: Optional[threading.Thread] = None
+        # Guards the thread handle, `pending` and the metrics
+        self.lock = threading.Lock()
+        # Queued (not yet started) request per path
+        self.pending: Dict[str, _WriteRequest] = {}
+
+        # Metrics
+        self.writes = 0
+        self.failures = 0
+        self.blocked_submits = 0
+        self.coalesced = 0
+        self.total_write_time = 0.0
+        self.max_write_time = 0.0
+        self.last_write_time = 0.0
+        self.max_queue_wait = 0.0
+
+    def start(self) -> None:
+        """Start the writer thread (idempotent)"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name="panda-persistence", daemon=True)
+            self.thread.start()
+
+    def submit(self, path: str, payload: bytes, wait: bool = False,
+               on_done: Optional[Callable[[bool], None]] = None) -> bool:
+        """Queue a snapshot for writing.
+
+        If a snapshot for the same path is still waiting, its payload is
+        replaced by this newer one. Otherwise the request is queued, blocking
+        while the queue is full. With wait=True the call returns only after
+        the file is on disk and reports whether the write succeeded;
+        otherwise it returns True once queued. on_done(ok) runs on the writer
+        thread once this snapshot (or a newer one replacing it) is written.
+        """
+        self.start()
+        done = threading.Event() if wait else None
+        with self.lock:
+            request = self.pending.get(path)
+            queued = request is not None
+            if queued:
+                request.payload = payload
+                self.coalesced += 1
+            else:
+                request = self.pending[path] = _WriteRequest(path, payload)
+            if done is not None:
+                request.waiters.append(done)
+            if on_done is not None:
+                request.callbacks.append(on_done)
+
+        if not queued:
+            try:
+                self.queue.put_nowait(request)
+            except queue.Full:
+                with self.lock:
+                    self.blocked_submits += 1
+                self.queue.put(request)
+
+        if done is not None:
+            done.wait()
+            return request.ok
+        return True
+
+    def flush(self) -> None:
+        """Block until every queued snapshot has been written"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def stop(self) -> None:
+        """Write everything still queued and stop the thread"""
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(None)
+        thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and write latency metrics (milliseconds)"""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "writes": self.writes,
+            "failures": self.failures,
+            "blocked_submits": self.blocked_submits,
+            "coalesced": self.coalesced,
+            "avg_write_ms": (self.total_write_time / self.writes * 1000) if self.writes else 0.0,
+            "max_write_ms": self.max_write_time * 1000,
+            "last_write_ms": self.last_write_time * 1000,
+            "max_queue_wait_ms": self.max_queue_wait * 1000,
+            "fsync": self.fsync,
+        }
+
+    def _run(self) -> None:
+        while True:
+            request = self.queue.get()
+            try:
+                if request is None:
+                    return
+                with self.lock:
+                    # Later submits for this path queue a new request from here on
+                    if self.pending.get(request.path) is request:
+                        del self.pending[request.path]
+                    payload = request.payload
+                    waiters = request.waiters
+                    callbacks = request.callbacks
+                    self.max_queue_wait = max(self.max_queue_wait, time.monotonic() - request.queued_at)
+                request.ok = self._write(request.path, payload)
+                for callback in callbacks:
+                    try:
+                        callback(request.ok)
+                    except Exception as e:
+                        logger.error(f"Write callback for {request.path} failed: {e}")
+                for done in waiters:
+                    done.set()
+            finally:
+                self.queue.task_done()
+
+    def _write(self, path: str, payload: bytes) -> bool:
+        started = time.monotonic()
+        ok = False
+        tmp_path = None
+        try:
+            # Unique temp file next to the target so os.replace stays atomic
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            ok = True
+        except Exception as e:
+            logger.error(f"Failed to write {path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        finally:
+            elapsed = time.monotonic() - started
+            with self.lock:
+                self.writes += 1
+                if not ok:
+                    self.failures += 1
+                self.total_write_time += elapsed
+                self.last_write_time = elapsed
+                self.max_write_time = max(self.max_write_time, elapsed)
+        return ok
+
+# Shared worker for every JSON file the bot writes
+persistence = PersistenceWorker()
+atexit.register(persistence.stop)
@@ -0,0 +1,321 @@
+import os
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import date
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from . import codec
+from .clock import to_epoch
+from .user_records import load_user_records, migrate_panda_timestamps
+
+logger = logging.getLogger(__name__)
+
+STARTING_CURRENCY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS balances (
+    user_id TEXT PRIMARY KEY,
+    coins INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pandas (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    available INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pandas_available ON pandas (available, position);
+CREATE TABLE IF NOT EXISTS adoptions (
+    user_id TEXT NOT NULL,
+    panda_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, panda_id)
+);
+CREATE INDEX IF NOT EXISTS idx_adoptions_user ON adoptions (user_id, position);
+CREATE TABLE IF NOT EXISTS cooldowns (
+    user_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (user_id, action)
+);
+CREATE TABLE IF NOT EXISTS streaks (
+    user_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_date TEXT NOT NULL,
+    PRIMARY KEY (user_id, action)
+);
+"""
+
+class SQLiteAdoptionStore:
+    """SQLite storage engine for the adoption system.
+
+    Every mutation touches a single indexed row, so the cost of a command
+    no longer grows with the number of users.
+    """
+
+    def __init__(self, path: str, default_pandas: List[Dict[str, Any]], legacy_json_path: Optional[str] = None):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        if not self.conn.execute("SELECT 1 FROM pandas LIMIT 1").fetchone():
+            if legacy_json_path and os.path.exists(legacy_json_path):
+                self.import_json(legacy_json_path, default_pandas)
+            else:
+                self._insert_pandas(default_pandas)
+
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """One-time upgrades of older databases, tracked with PRAGMA user_version"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # ISO timestamp strings -> epoch seconds
+            updates = []
+            for row in self.conn.execute("SELECT user_id, panda_id, data FROM adoptions"):
+                adopted = codec.loads(row["data"])
+                if migrate_panda_timestamps(adopted):
+                    updates.append((codec.dumps_text(adopted), row["user_id"], row["panda_id"]))
+            cooldowns = [
+                (to_epoch(row["last_used"]), row["user_id"], row["action"])
+                for row in self.conn.execute("SELECT user_id, action, last_used FROM cooldowns")
+            ]
+            with self._transaction():
+                self.conn.executemany("UPDATE adoptions SET data = ? WHERE user_id = ? AND panda_id = ?", updates)
+                self.conn.executemany("UPDATE cooldowns SET last_used = ? WHERE user_id = ? AND action = ?", cooldowns)
+                self.conn.execute("PRAGMA user_version = 1")
+            if updates or cooldowns:
+                logger.info(f"Converted timestamps in {len(updates)} adoptions and {len(cooldowns)} cooldowns to epoch seconds")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"Failed to close adoption database: {e}")
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one transaction (the connection is in autocommit mode otherwise)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _insert_pandas(self, pandas: List[Dict[str, Any]]) -> None:
+        """Insert catalog entries, keeping their original order"""
+        rows = []
+        for position, panda in enumerate(pandas):
+            data = {k: v for k, v in panda.items() if k != "available"}
+            rows.append((panda["id"], position, 1 if panda.get("available", True) else 0, codec.dumps_text(data)))
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pandas (id, position, available, data) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def import_json(self, json_path: str, default_pandas: List[Dict[str, Any]]) -> None:
+        """One-time migration of a legacy adoption_data.json file"""
+        try:
+            data = codec.load_file(json_path) or {}
+        except Exception as e:
+            logger.error(f"Failed to read {json_path} for migration: {e}. Starting fresh.")
+            data = {}
+
+        self._insert_pandas(data.get("available_pandas") or default_pandas)
+
+        balances, cooldowns, streaks = [], [], []
+        for user_id, record in load_user_records(data.get("users", {}), data.get("user_currency")).items():
+            user_id = str(user_id)
+            balances.append((user_id, record.balance))
+            for action in ("work", "daily"):
+                last_used = getattr(record, f"last_{action}")
+                if last_used:
+                    cooldowns.append((user_id, action, last_used))
+            for action in ("feed", "play"):
+                count, last_day = getattr(record, f"{action}_streak"), getattr(record, f"last_{action}_day")
+                if count or last_day:
+                    streaks.append((user_id, action, count, date.fromordinal(last_day).isoformat() if last_day else ""))
+        adoptions = [
+            (user_id, adopted["panda_id"], position, codec.dumps_text(adopted))
+            for user_id, user_pandas in data.get("adoptions", {}).items()
+            for position, adopted in enumerate(user_pandas)
+        ]
+
+        with self._transaction():
+            self.conn.executemany("INSERT OR REPLACE INTO balances (user_id, coins) VALUES (?, ?)", balances)
+            self.conn.executemany("INSERT OR REPLACE INTO cooldowns (user_id, action, last_used) VALUES (?, ?, ?)", cooldowns)
+            self.conn.executemany("INSERT OR REPLACE INTO streaks (user_id, action, count, last_date) VALUES (?, ?, ?, ?)", streaks)
+            self.conn.executemany("INSERT OR REPLACE INTO adoptions (user_id, panda_id, position, data) VALUES (?, ?, ?, ?)", adoptions)
+
+        logger.info(f"Migrated {json_path} into {self.path}: {len(balances)} balances, {len(adoptions)} adoptions")
+
+    # ==========================================
+    # Currency
+    # ==========================================
+
+    def get_user_currency(self, user_id: str) -> int:
+        row = self.conn.execute("SELECT coins FROM balances WHERE user_id = ?", (user_id,)).fetchone()
+        return row["coins"] if row else STARTING_CURRENCY
+
+    def add_user_currency(self, user_id: str, amount: int) -> None:
+        self.conn.execute(
+            "INSERT INTO balances (user_id, coins) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET coins = coins + excluded.coins - ?",
+            (user_id, STARTING_CURRENCY + amount, STARTING_CURRENCY)
+        )
+
+    def subtract_user_currency(self, user_id: str, amount: int) -> bool:
+        with self._transaction():
+            current = self.get_user_currency(user_id)
+            if current < amount:
+                return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO balances (user_id, coins) VALUES (?, ?)", (user_id, current - amount)
+            )
+            return True
+
+    # ==========================================
+    # Panda catalog and adoptions
+    # ==========================================
+
+    @staticmethod
+    def _panda_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        panda = codec.loads(row["data"])
+        panda["available"] = bool(row["available"])
+        return panda
+
+    def get_available_pandas(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT data, available FROM pandas WHERE available = 1 ORDER BY position")
+        return [self._panda_from_row(row) for row in rows]
+
+    def get_panda_by_id(self, panda_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT data, available FROM pandas WHERE id = ?", (panda_id,)).fetchone()
+        return self._panda_from_row(row) if row else None
+
+    def adopt_panda(self, user_id: str, panda_id: str, record: Dict[str, Any]) -> bool:
+        with self._transaction():
+            cur = self.conn.execute("UPDATE pandas SET available = 0 WHERE id = ? AND available = 1", (panda_id,))
+            if cur.rowcount == 0:
+                return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO adoptions (user_id, panda_id, position, data) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM adoptions WHERE user_id = ?), ?)",
+                (user_id, panda_id, user_id, codec.dumps_text(record))
+            )
+            return True
+
+    def get_user_pandas(self, user_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT data FROM adoptions WHERE user_id = ? ORDER BY position", (user_id,))
+        return [codec.loads(row["data"]) for row in rows]
+
+    def get_owned_panda(self, user_id: str, panda_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT data FROM adoptions WHERE user_id = ? AND panda_id = ?", (user_id, panda_id)
+        ).fetchone()
+        return codec.loads(row["data"]) if row else None
+
+    def update_panda_stats(self, user_id: str, panda_id: str, stat: str, value: Any) -> bool:
+        cur = self.conn.execute(
+            "UPDATE adoptions SET data = json_set(data, ?, json(?)) WHERE user_id = ? AND panda_id = ?",
+            (f'$."{stat}"', codec.dumps_text(value), user_id, panda_id)
+        )
+        return cur.rowcount > 0
+
+    # ==========================================
+    # Cooldowns and streaks
+    # ==========================================
+
+    def get_cooldown_timestamp(self, user_id: str, action: str) -> int:
+        row = self.conn.execute(
+            "SELECT last_used FROM cooldowns WHERE user_id = ? AND action = ?", (user_id, action)
+        ).fetchone()
+        # Databases created before the epoch migration declare the column TEXT
+        return to_epoch(row["last_used"]) if row else 0
+
+    def set_cooldown_timestamp(self, user_id: str, action: str, timestamp: int) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cooldowns (user_id, action, last_used) VALUES (?, ?, ?)",
+            (user_id, action, timestamp)
+        )
+
+    def iter_cooldowns(self) -> Iterator[Tuple[str, str, Optional[str], int]]:
+        for row in self.conn.execute("SELECT user_id, action, last_used FROM cooldowns"):
+            yield row["user_id"], row["action"], None, to_epoch(row["last_used"])
+        rows = self.conn.execute(
+            "SELECT user_id, panda_id, json_extract(data, '$.last_fed') AS last_fed, "
+            "json_extract(data, '$.last_played') AS last_played FROM adoptions"
+        )
+        for row in rows:
+            yield row["user_id"], "feed", row["panda_id"], row["last_fed"] or 0
+            yield row["user_id"], "play", row["panda_id"], row["last_played"] or 0
+
+    def get_streak(self, user_id: str, action: str) -> Tuple[int, str]:
+        row = self.conn.execute(
+            "SELECT count, last_date FROM streaks WHERE user_id = ? AND action = ?", (user_id, action)
+        ).fetchone()
+        return (row["count"], row["last_date"]) if row else (0, "")
+
+    def set_streak(self, user_id: str, action: str, count: int, last_date: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO streaks (user_id, action, count, last_date) VALUES (?, ?, ?, ?)",
+            (user_id, action, count, last_date)
+        )
+
+    # ==========================================
+    # Transactions
+    # ==========================================
+
+    def apply_transaction(self, txn, adoption_record: Optional[Dict[str, Any]] = None) -> bool:
+        """Apply a staged AdoptionTransaction in a single database transaction"""
+        user_id = txn.user_id
+        with self._transaction():
+            balance = self.get_user_currency(user_id) + txn.currency_delta
+            if balance < 0:
+                return False
+
+            if txn.panda_updates:
+                rows = self.conn.execute("SELECT panda_id FROM adoptions WHERE user_id = ?", (user_id,))
+                owned = {row["panda_id"] for row in rows}
+                if any(panda_id not in owned and panda_id != txn.adopt_panda_id for panda_id in txn.panda_updates):
+                    return False
+
+            if txn.adopt_panda_id:
+                cur = self.conn.execute(
+                    "UPDATE pandas SET available = 0 WHERE id = ? AND available = 1", (txn.adopt_panda_id,)
+                )
+                if cur.rowcount == 0:
+                    return False
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO adoptions (user_id, panda_id, position, data) "
+                    "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM adoptions WHERE user_id = ?), ?)",
+                    (user_id, txn.adopt_panda_id, user_id, codec.dumps_text(adoption_record))
+                )
+
+            if txn.currency_delta:
+                self.conn.execute("INSERT OR REPLACE INTO balances (user_id, coins) VALUES (?, ?)", (user_id, balance))
+
+            for panda_id, stats in txn.panda_updates.items():
+                if panda_id == txn.adopt_panda_id:
+                    continue
+                # One json_set call updates every staged field of the row
+                args = []
+                for stat, value in stats.items():
+                    args.extend((f'$."{stat}"', codec.dumps_text(value)))
+                setters = ", ".join("?, json(?)" for _ in stats)
+                self.conn.execute(
+                    f"UPDATE adoptions SET data = json_set(data, {setters}) WHERE user_id = ? AND panda_id = ?",
+                    (*args, user_id, panda_id)
+                )
+
+            for action, (count, last_date) in txn.streaks.items():
+                self.set_streak(user_id, action, count, last_date)
+            for action, timestamp in txn.cooldowns.items():
+                self.set_cooldown_timestamp(user_id, action, timestamp)
+            return True
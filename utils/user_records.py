@@ -0,0 +1,116 @@
+import re
+import logging
+from datetime import date
+from typing import Dict, Any, Optional, Tuple
+from .clock import to_epoch
+
+logger = logging.getLogger(__name__)
+
+STARTING_CURRENCY = 100
+
+# Legacy flat keys stored in adoption_data["user_currency"]
+_LEGACY_STREAK_DATE = re.compile(r"^last_(\w+)_date_(\d+)$")
+_LEGACY_STREAK_COUNT = re.compile(r"^(\w+)_streak_(\d+)$")
+_LEGACY_COOLDOWN = re.compile(r"^last_(\w+)_(\d+)$")
+
+# Adoption record fields holding epoch seconds (ISO strings before migration)
+PANDA_TIMESTAMP_FIELDS = ("adopted_date", "adoption_date", "last_fed", "last_played")
+
+def parse_legacy_key(key: str) -> Optional[Tuple[str, str]]:
+    """Split a legacy user_currency key into (user_id, field).
+
+    "123" -> ("123", "balance"), "last_work_123" -> ("123", "last_work"),
+    "feed_streak_123" -> ("123", "feed_streak"), "last_feed_date_123" -> ("123", "last_feed_day")
+    """
+    if key.isdigit():
+        return key, "balance"
+    if match := _LEGACY_STREAK_DATE.match(key):
+        return match.group(2), f"last_{match.group(1)}_day"
+    if match := _LEGACY_STREAK_COUNT.match(key):
+        return match.group(2), f"{match.group(1)}_streak"
+    if match := _LEGACY_COOLDOWN.match(key):
+        return match.group(2), f"last_{match.group(1)}"
+    return None
+
+class UserRecord:
+    """Compact per-user economy state.
+
+    Cooldowns are epoch seconds and streak days are date ordinals; 0 means never.
+    """
+
+    __slots__ = (
+        "balance",
+        "last_work", "last_daily",
+        "feed_streak", "last_feed_day",
+        "play_streak", "last_play_day",
+    )
+
+    def __init__(self, balance: int = STARTING_CURRENCY):
+        self.balance = balance
+        self.last_work = 0
+        self.last_daily = 0
+        self.feed_streak = 0
+        self.last_feed_day = 0
+        self.play_streak = 0
+        self.last_play_day = 0
+
+    def set_field(self, field: str, value: Any) -> None:
+        """Set a field, accepting legacy ISO strings for timestamps and dates"""
+        if field.endswith("_day") and isinstance(value, str):
+            value = date.fromisoformat(value).toordinal() if value else 0
+        elif field.startswith("last_"):
+            value = to_epoch(value)
+        setattr(self, field, int(value))
+
+    def to_dict(self) -> Dict[str, int]:
+        """Serialize non-default fields"""
+        data = {}
+        for field in self.__slots__:
+            value = getattr(self, field)
+            if value or field == "balance":
+                data[field] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserRecord":
+        record = cls()
+        for field, value in data.items():
+            try:
+                record.set_field(field, value)
+            except (AttributeError, TypeError, ValueError):
+                logger.warning(f"Ignoring unknown user record field {field!r}")
+        return record
+
+def migrate_panda_timestamps(adopted: Dict[str, Any]) -> bool:
+    """Convert legacy ISO timestamps in an adoption record to epoch seconds. Returns True if changed."""
+    changed = False
+    for field in PANDA_TIMESTAMP_FIELDS:
+        value = adopted.get(field)
+        if isinstance(value, str):
+            adopted[field] = to_epoch(value)
+            changed = True
+    return changed
+
+def load_user_records(users: Dict[str, Any], legacy_currency: Optional[Dict[str, Any]] = None) -> Dict[int, UserRecord]:
+    """Build the in-memory user index, migrating legacy flat user_currency keys"""
+    records: Dict[int, UserRecord] = {int(user_id): UserRecord.from_dict(data) for user_id, data in users.items()}
+
+    migrated = 0
+    for key, value in (legacy_currency or {}).items():
+        parsed = parse_legacy_key(key)
+        if not parsed:
+            logger.warning(f"Ignoring unknown user_currency key {key!r}")
+            continue
+        user_id, field = parsed
+        record = records.get(int(user_id))
+        if record is None:
+            record = records[int(user_id)] = UserRecord()
+        try:
+            record.set_field(field, value)
+            migrated += 1
+        except (AttributeError, TypeError, ValueError):
+            logger.warning(f"Ignoring legacy user_currency key {key!r}")
+
+    if migrated:
+        logger.info(f"Migrated {migrated} legacy user_currency entries into {len(records)} user records")
+    return records